@@ -14,8 +14,11 @@ echo.
 echo 2. Building games...
 echo.
 
+echo Building glyph atlas (Japanese text)...
+python tools\build_glyph_atlas.py
+
 echo Building Fighting Game...
-pyinstaller --onefile --windowed --name FightingGame fighting.py
+pyinstaller --onefile --windowed --name FightingGame --add-data "fighting_game\assets;fighting_game\assets" fighting.py
 
 echo Building Dodge Game...
 pyinstaller --onefile --windowed --name DodgeGame dodge.py
@@ -0,0 +1,5 @@
+"""両方のゲーム（dodge_game / fighting_game）で使う共通モジュール
+
+pygbag はゲームフォルダの中身しかビルドに含めないので、
+Web版のビルドでは build.yml でこのフォルダを各ゲームフォルダにコピーしている。
+"""
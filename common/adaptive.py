@@ -0,0 +1,113 @@
+"""重いときに描画を間引き、見た目を落として速さを保つ（アダプティブ画質）
+
+毎フレームの処理時間（begin_frame から presented まで）と clock.tick の値を見て、
+WINDOW フレームごとに判断する。
+
+    間に合っていない → まず描画を間引く（ゲームの計算は固定タイムステップなので続く）
+                       それでも足りなければ画質を1段ずつ下げる
+    余裕がある（HEADROOM_WINDOWS 回続けて） → 逆の順番で戻す（画質を上げてから、間引きを減らす）
+
+画質の段階は HIGH / MEDIUM / LOW。各ゲームは quality を見て、細かい飾りを描くかどうかを決める。
+telemetry() で今の画質と間引きの割合を返す。
+"""
+import time
+
+LOW, MEDIUM, HIGH = 0, 1, 2
+QUALITY_NAMES = ("LOW", "MEDIUM", "HIGH")
+
+WINDOW = 30             # 何フレームごとに判断するか
+OVERLOAD = 0.9          # 処理時間がフレームの持ち時間のこの割合を超えたら重い
+DEADLINE_MISS = 1.5     # clock.tick の値が持ち時間のこの倍を超えたら（画面の更新に間に合わなかった）重い
+HEADROOM = 0.5          # 処理時間がこの割合より少なければ余裕がある
+HEADROOM_WINDOWS = 3    # 余裕が何回続いたら戻すか（行ったり来たりしないように）
+MAX_SKIP = 2            # 描画するフレームの間に何フレームまで描画を飛ばすか
+
+
+class AdaptiveQuality:
+    def __init__(self, fps=60, enabled=True, verbose=False):
+        self.budget_ms = 1000 / fps
+        self.enabled = enabled
+        self.verbose = verbose  # 切り替えたときに表示する
+        self.quality = HIGH
+        self.skip = 0
+
+        self.start = 0
+        self.countdown = 0  # あと何フレーム描画を飛ばすか
+        self.work_ms = []
+        self.late_frames = 0
+        self.headroom_count = 0
+
+        # 統計（直近の WINDOW フレーム）
+        self.rendered = 0
+        self.skipped = 0
+        self.skip_rate = 0.0
+        self.avg_work_ms = 0.0
+
+    def begin_frame(self):
+        self.start = time.perf_counter()
+
+    def should_render(self):
+        """このフレームを描画するか（間引き中は skip フレームに1回だけ描く）"""
+        if self.countdown > 0:
+            self.countdown -= 1
+            self.skipped += 1
+            return False
+        self.countdown = self.skip
+        self.rendered += 1
+        return True
+
+    def presented(self):
+        """描画（または描画を飛ばした）後、clock.tick の前に呼ぶ。ここまでを処理時間とする"""
+        self.work_ms.append((time.perf_counter() - self.start) * 1000)
+
+    def end_frame(self, frame_ms):
+        """clock.tick の値を渡す"""
+        if frame_ms > self.budget_ms * DEADLINE_MISS:
+            self.late_frames += 1
+        if len(self.work_ms) >= WINDOW:
+            self.evaluate()
+
+    def evaluate(self):
+        frames = len(self.work_ms)
+        self.avg_work_ms = sum(self.work_ms) / frames
+        self.skip_rate = self.skipped / frames
+        overloaded = self.avg_work_ms > self.budget_ms * OVERLOAD or self.late_frames > frames // 4
+        roomy = self.avg_work_ms < self.budget_ms * HEADROOM and self.late_frames == 0
+        self.work_ms.clear()
+        self.late_frames = 0
+        self.rendered = self.skipped = 0
+        if not self.enabled:
+            return
+
+        if overloaded:
+            self.headroom_count = 0
+            if self.skip < MAX_SKIP:
+                self.change(self.quality, self.skip + 1)
+            elif self.quality > LOW:
+                self.change(self.quality - 1, self.skip)
+        elif roomy:
+            self.headroom_count += 1
+            if self.headroom_count >= HEADROOM_WINDOWS:
+                self.headroom_count = 0
+                if self.quality < HIGH:
+                    self.change(self.quality + 1, self.skip)
+                elif self.skip > 0:
+                    self.change(self.quality, self.skip - 1)
+        else:
+            self.headroom_count = 0
+
+    def change(self, quality, skip):
+        if self.verbose:
+            print(f"Adaptive quality: {QUALITY_NAMES[self.quality]} skip {self.skip} -> "
+                  f"{QUALITY_NAMES[quality]} skip {skip} (work {self.avg_work_ms:.1f} ms / {self.budget_ms:.1f} ms)")
+        self.quality = quality
+        self.skip = skip
+        self.countdown = 0
+
+    def telemetry(self):
+        return {
+            "quality": QUALITY_NAMES[self.quality],
+            "skip": self.skip,
+            "skip_rate": self.skip_rate,
+            "avg_work_ms": self.avg_work_ms,
+        }
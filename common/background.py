@@ -0,0 +1,30 @@
+"""動かない背景を一枚の Surface に焼き付けておく仕組み"""
+import pygame
+
+
+class BackgroundLayer:
+    """painter(surface) で描いた背景を覚えておき、毎フレーム blit 1回で描く
+
+    画面サイズが変わったときは自動で描き直す。
+    ステージごとに背景を変えたいときは invalidate() で作り直させる。
+    """
+
+    def __init__(self, painter):
+        self.painter = painter
+        self.surface = None
+        self.bakes = 0  # 焼き付けた回数（確認用）
+
+    def invalidate(self, painter=None):
+        if painter is not None:
+            self.painter = painter
+        self.surface = None
+
+    def bake(self, target):
+        self.surface = pygame.Surface(target.get_size(), 0, target)
+        self.painter(self.surface)
+        self.bakes += 1
+
+    def draw(self, target):
+        if self.surface is None or self.surface.get_size() != target.get_size():
+            self.bake(target)
+        target.blit(self.surface, (0, 0))
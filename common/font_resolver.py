@@ -0,0 +1,97 @@
+"""システムフォントの場所を一度だけ探して覚えておく（EXE版用）
+
+pygame.font.SysFont() は呼ぶたびに（初回は特に）PC の全フォントを調べるので、
+フォントが多い PC では起動がとても遅くなる。
+ここでは見つけたフォントファイルの場所を小さな JSON に保存しておき、
+次回からはそのファイルを pygame.font.Font(path, size) で直接読み込む。
+
+フォントを追加・削除するとフォントフォルダの更新日時が変わるので、
+それをキーにして、変わっていたら探し直す。
+どれも見つからなかったときは pygame に同梱されている標準フォント（Font(None, size)）を使う。
+"""
+import json
+import os
+import sys
+
+import pygame
+
+CACHE_VERSION = 1
+
+
+def cache_path():
+    """キャッシュファイルの場所（Windows は %LOCALAPPDATA%、それ以外は ~/.cache）"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "game_tutorial", "font_cache.json")
+
+
+def font_dirs():
+    """OS のフォントフォルダ（あるものだけ）"""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        dirs = [os.path.join(windir, "Fonts")]
+        if os.environ.get("LOCALAPPDATA"):
+            dirs.append(os.path.join(os.environ["LOCALAPPDATA"], "Microsoft", "Windows", "Fonts"))
+    elif sys.platform == "darwin":
+        dirs = ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    else:
+        dirs = ["/usr/share/fonts", "/usr/local/share/fonts",
+                os.path.join(home, ".local", "share", "fonts"), os.path.join(home, ".fonts")]
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def cache_key(names):
+    """探すフォント名と、フォントフォルダの更新日時"""
+    return {
+        "version": CACHE_VERSION,
+        "names": list(names),
+        "dirs": {d: os.path.getmtime(d) for d in font_dirs()},
+    }
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, entries):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+    except OSError:
+        pass  # 保存できなくても次回また探すだけ
+
+
+def resolve_font(names, path=None):
+    """names の中で最初に見つかったフォントファイルのパス（なければ None）"""
+    path = path or cache_path()
+    entries = load_cache(path)
+    cache_id = ",".join(names)
+    key = cache_key(names)
+    entry = entries.get(cache_id)
+    if entry and entry["key"] == key and (entry["path"] is None or os.path.exists(entry["path"])):
+        return entry["path"]
+
+    # キャッシュがないか古い → ここで一度だけ全フォントを調べる
+    found = pygame.font.match_font(names)
+    entries[cache_id] = {"key": key, "path": found}
+    save_cache(path, entries)
+    return found
+
+
+_resolved = {}
+
+
+def load_font(size, names):
+    """names のフォントを size で読み込む。場所を探すのはプロセスで1回、キャッシュがあれば0回"""
+    names = tuple(names)
+    if names not in _resolved:
+        _resolved[names] = resolve_font(names)
+    try:
+        return pygame.font.Font(_resolved[names], size)
+    except OSError:
+        return pygame.font.Font(None, size)  # ファイルが壊れている・消えたときは標準フォント
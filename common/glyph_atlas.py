@@ -0,0 +1,90 @@
+"""前もって画像にしておいた文字（グリフアトラス）で文字列を描く
+
+Web版で使う pygame の標準フォント（Font(None, size)）には日本語の文字がない。
+そこでビルド時に tools/build_glyph_atlas.py で、ゲームで使う文字だけを1枚の画像（白い文字 + 透明）と
+位置の JSON にしておき、実行時はその画像から1文字ずつ切り出して並べる。
+実行時にフォントを読み込んだり文字を描いたりしないので、EXE版とブラウザ版で同じ文字になる。
+
+GlyphFont は pygame.font.Font と同じ render / size / get_height を持つので、TextCache などにそのまま渡せる。
+アトラスにない文字が来たときは、標準フォントでその文字だけ描いて追加する（日本語は出ないが落ちない）。
+"""
+import json
+import os
+
+import pygame
+
+
+def atlas_paths(directory, size):
+    """(画像, JSON) のパス"""
+    base = os.path.join(directory, f"glyphs_{size}")
+    return base + ".png", base + ".json"
+
+
+def atlas_exists(directory, size):
+    return all(os.path.exists(p) for p in atlas_paths(directory, size))
+
+
+class GlyphFont:
+    """グリフアトラスから文字列を組み立てるフォント（最初に使われたときに読み込む）"""
+
+    def __init__(self, directory, size):
+        self.directory = directory
+        self.point_size = size
+        self.sheet = None
+        self.glyphs = {}  # 文字 -> 画像の中の Rect
+        self.height = 0
+        self.fallback = None
+
+    def load(self):
+        image_path, json_path = atlas_paths(self.directory, self.point_size)
+        with open(json_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        sheet = pygame.image.load(image_path)
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+        self.sheet = sheet
+        self.height = meta["height"]
+        self.glyphs = {ch: pygame.Rect(x, y, w, self.height) for ch, (x, y, w) in meta["glyphs"].items()}
+
+    def glyph(self, ch):
+        """文字の (画像, 範囲)。アトラスにない文字は標準フォントで描いて覚えておく"""
+        rect = self.glyphs.get(ch)
+        if rect is not None:
+            return self.sheet, rect
+        if self.fallback is None:
+            self.fallback = {}
+            self.fallback_font = pygame.font.Font(None, self.point_size)
+        if ch not in self.fallback:
+            self.fallback[ch] = self.fallback_font.render(ch, True, (255, 255, 255))
+        surface = self.fallback[ch]
+        return surface, surface.get_rect()
+
+    def size(self, text):
+        if self.sheet is None:
+            self.load()
+        return sum(self.glyph(ch)[1].width for ch in text), self.height
+
+    def get_height(self):
+        if self.sheet is None:
+            self.load()
+        return self.height
+
+    def get_linesize(self):
+        return self.get_height()
+
+    def render(self, text, antialias, color, background=None):
+        """白い文字を並べてから color を掛けて色を付ける（antialias はアトラスを作ったときに決まっている）"""
+        width, height = self.size(text)
+        surface = pygame.Surface((max(width, 1), height), pygame.SRCALPHA)
+        x = 0
+        for ch in text:
+            image, rect = self.glyph(ch)
+            surface.blit(image, (x, 0), rect)
+            x += rect.width
+        surface.fill(tuple(color)[:3] + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+        if background is None:
+            return surface
+        result = pygame.Surface(surface.get_size())
+        result.fill(background)
+        result.blit(surface, (0, 0))
+        return result
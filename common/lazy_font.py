@@ -0,0 +1,24 @@
+"""最初に使われたときに作るフォント"""
+import pygame
+
+
+class LazyFont:
+    """pygame.font.Font の代わりに使える入れ物
+
+    フォントの読み込みは起動時に意外と時間がかかるので、
+    render() などが最初に呼ばれたときに loader(size) で作る。
+    loader を省略すると pygame の標準フォント（Font(None, size)）。
+    """
+
+    def __init__(self, size, loader=None):
+        self._size = size
+        self._loader = loader
+        self._font = None
+
+    def __getattr__(self, name):
+        # render / size / get_height など、ここにない属性は本物のフォントに任せる
+        font = self.__dict__.get("_font")
+        if font is None:
+            loader = self._loader or (lambda size: pygame.font.Font(None, size))
+            font = self._font = loader(self._size)
+        return getattr(font, name)
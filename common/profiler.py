@@ -0,0 +1,167 @@
+"""1フレームの処理ごとの時間を測るプロファイラ（F3 で表示）
+
+メインループの区切りごとに mark("update") のように呼ぶと、前の mark からの時間がその区間に足される。
+直近 WINDOW フレーム分から p50 / p95 / p99 を求め、区間ごとに色分けしたグラフと一緒に画面に重ねて描く。
+csv_path を指定すると、全フレームの区間ごとの時間を終了時に CSV に書き出す。
+
+止めている間（enabled=False）は mark() がすぐ戻るだけなので、ほとんど時間はかからない。
+ヘッドレス実行などで描画もしないときは NullProfiler を使う。
+"""
+import csv
+import time
+from collections import deque
+
+import pygame
+
+WINDOW = 240        # パーセンタイルを求めるフレーム数（4秒分）
+REFRESH_FRAMES = 30  # 数字の表示を更新する間隔
+GRAPH_SIZE = (240, 80)
+GRAPH_SCALE_MS = 20.0  # グラフの高さが何ミリ秒か（60FPS の 16.7ms が見えるように）
+BUDGET_MS = 1000 / 60
+
+COLORS = [(80, 160, 255), (255, 200, 0), (80, 220, 120), (255, 120, 60),
+          (200, 100, 255), (0, 220, 220), (160, 160, 160), (255, 80, 160)]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+class NullProfiler:
+    """何もしないプロファイラ（FrameProfiler と同じ呼び方ができる）"""
+    enabled = False
+    visible = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def toggle(self):
+        pass
+
+    def draw(self, surface, font):
+        pass
+
+    def close(self):
+        pass
+
+
+class FrameProfiler:
+    """phases: 区間の名前（表示・CSV の列の順番）"""
+
+    def __init__(self, phases, enabled=False, csv_path=None):
+        self.phases = list(phases)
+        self.index = {name: i for i, name in enumerate(self.phases)}
+        self.enabled = enabled or csv_path is not None
+        self.visible = enabled
+        self.csv_path = csv_path
+        self.rows = []  # CSV 用（csv_path があるときだけためる）
+
+        self.current = [0] * len(self.phases)  # 今のフレームの区間ごとの時間 (ns)
+        self.history = [deque(maxlen=WINDOW) for _ in self.phases]
+        self.totals = deque(maxlen=WINDOW)
+        self.frame = 0
+        self.last = 0
+
+        self.graph = None
+        self.area = pygame.Rect(0, 0, 0, 0)  # 最後に描いた範囲（ダーティ矩形描画用）
+        self.lines = []  # 表示する数字（REFRESH_FRAMES ごとに作り直す）
+        self.line_surfaces = None
+
+    def begin_frame(self):
+        if self.enabled:
+            self.last = time.perf_counter_ns()
+
+    def mark(self, phase):
+        """前の mark（か begin_frame）からの時間を phase に足す"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self.current[self.index[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        current = self.current
+        for h, ns in zip(self.history, current):
+            h.append(ns)
+        total = sum(current)
+        self.totals.append(total)
+        if self.csv_path is not None:
+            self.rows.append([self.frame] + current + [total])
+        if self.visible:
+            self.plot(current)
+            if self.frame % REFRESH_FRAMES == 0:
+                self.refresh()
+        self.current = [0] * len(self.phases)
+        self.frame += 1
+
+    def toggle(self):
+        """表示の切り替え（表示中だけ測る。CSV を書くときは常に測る）"""
+        self.visible = not self.visible
+        self.enabled = self.visible or self.csv_path is not None
+        self.current = [0] * len(self.phases)  # フレームの途中で切り替えたので、このフレームは測り直す
+        self.last = time.perf_counter_ns()
+        if self.visible:
+            self.graph = None
+            self.refresh()
+
+    def stats(self, i=None):
+        """(p50, p95, p99) をミリ秒で。i を省略するとフレーム全体"""
+        values = sorted(self.totals if i is None else self.history[i])
+        return tuple(percentile(values, p) / 1e6 for p in (50, 95, 99))
+
+    def refresh(self):
+        self.lines = [("frame", (255, 255, 255), self.stats())]
+        for i, name in enumerate(self.phases):
+            self.lines.append((name, COLORS[i % len(COLORS)], self.stats(i)))
+        self.line_surfaces = None
+
+    def plot(self, current):
+        """グラフを1列左にずらして、右端に今のフレームの積み上げ棒を描く"""
+        w, h = GRAPH_SIZE
+        if self.graph is None:
+            self.graph = pygame.Surface(GRAPH_SIZE)
+            self.graph.fill((0, 0, 0))
+        graph = self.graph
+        graph.scroll(-1, 0)
+        graph.fill((0, 0, 0), (w - 1, 0, 1, h))
+        y = h
+        for i, ns in enumerate(current):
+            bar = int(ns / 1e6 / GRAPH_SCALE_MS * h)
+            if bar:
+                graph.fill(COLORS[i % len(COLORS)], (w - 1, y - bar, 1, bar))
+                y -= bar
+        budget_y = h - int(BUDGET_MS / GRAPH_SCALE_MS * h)
+        graph.fill((255, 0, 0), (w - 1, budget_y, 1, 1))
+
+    def draw(self, surface, font):
+        if not self.visible or self.graph is None:
+            return
+        x, y = surface.get_width() - GRAPH_SIZE[0] - 10, 10
+        self.area = surface.blit(self.graph, (x, y))
+        y += GRAPH_SIZE[1] + 4
+        if self.line_surfaces is None:
+            self.line_surfaces = [font.render(f"{name:<10}{p50:6.2f}{p95:6.2f}{p99:6.2f} ms", True, color, (0, 0, 0))
+                                  for name, color, (p50, p95, p99) in self.lines]
+        for text in self.line_surfaces:
+            self.area.union_ip(surface.blit(text, (x, y)))
+            y += text.get_height()
+
+    def close(self):
+        """csv_path があれば全フレームの記録を書き出す"""
+        if self.csv_path is None or not self.rows:
+            return
+        with open(self.csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{name}_ns" for name in self.phases] + ["total_ns"])
+            writer.writerows(self.rows)
+        print(f"Profile saved: {self.csv_path} ({len(self.rows)} frames)")
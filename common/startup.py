@@ -0,0 +1,74 @@
+"""起動にかかった時間の計測
+
+main.py の一番最初で time.perf_counter_ns() を取っておき、StartupTimer に渡す。
+そこから次の区切りまでの時間を測る。
+
+    import        main.py のモジュール読み込みが終わるまで（pygame・共通モジュールの import を含む）
+    init          pygame の初期化とウィンドウ作成まで
+    first_frame   最初の画面が表示されるまで（display.flip の後）
+    interactive   その後、最初にイベント（キー入力）を処理できたところまで
+
+Python 自体の起動や、PyInstaller の EXE が中身を展開する時間は main.py より前なので含まれない。
+"""
+import json
+import sys
+import time
+
+STAGES = ("import", "init", "first_frame", "interactive")
+
+
+def runtime_kind():
+    """native（python で実行）/ pyinstaller（EXE）/ pygbag（ブラウザ）"""
+    if sys.platform == "emscripten":
+        return "pygbag"
+    if getattr(sys, "frozen", False):
+        return "pyinstaller"
+    return "native"
+
+
+class StartupTimer:
+    """report: 終わったら表示する / json_path: 終わったら1行の JSON を追記する（何回も起動して比べる用）"""
+
+    def __init__(self, start_ns, report=False, json_path=None):
+        self.start = start_ns
+        self.report = report
+        self.json_path = json_path
+        self.marks = {}
+        self.done = False
+
+    def mark(self, stage):
+        if stage not in self.marks:
+            self.marks[stage] = time.perf_counter_ns()
+
+    def presented(self):
+        """最初の display.flip の後に呼ぶ"""
+        self.mark("first_frame")
+
+    def events_handled(self):
+        """イベント処理の後に毎フレーム呼ぶ。最初の画面が出た後なら interactive にして結果を出す"""
+        if self.done or "first_frame" not in self.marks:
+            return
+        self.mark("interactive")
+        self.done = True
+        self.finish()
+
+    def results(self):
+        """区切りごとの (起動からの ms, 前の区切りからの ms)"""
+        results = {}
+        prev = self.start
+        for stage in STAGES:
+            if stage in self.marks:
+                t = self.marks[stage]
+                results[stage] = {"at_ms": (t - self.start) / 1e6, "took_ms": (t - prev) / 1e6}
+                prev = t
+        return results
+
+    def finish(self):
+        results = self.results()
+        if self.report:
+            parts = [f"{stage} {r['took_ms']:.1f}" for stage, r in results.items()]
+            total = results["interactive"]["at_ms"]
+            print(f"Startup ({runtime_kind()}): {', '.join(parts)} ms -> interactive at {total:.1f} ms")
+        if self.json_path:
+            with open(self.json_path, "a") as f:
+                f.write(json.dumps({"runtime": runtime_kind(), "stages": results}) + "\n")
@@ -0,0 +1,41 @@
+"""描画済み Surface を使い回すための LRU キャッシュ"""
+from collections import OrderedDict
+
+
+class SurfaceCache:
+    """キーごとに一度だけ Surface を作り、以降はそれを返す
+
+    maxsize を超えたら一番長く使われていないものから捨てる。
+    hits / misses / evictions はキャッシュの効き具合の確認用。
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, factory, *args):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = factory(*args)
+        self.entries[key] = surface
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,14 @@
+"""文字列の描画結果を使い回すキャッシュ"""
+from common.surface_cache import SurfaceCache
+
+
+class TextCache(SurfaceCache):
+    """font.render() の結果を (font, text, color, antialias) ごとに覚えておく
+
+    毎フレーム同じ文字列を描く HUD などで使う。
+    タイマーやスコアのように変わる文字列は、変わったときだけ描き直しになる。
+    """
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        return self.get(key, font.render, text, antialias, color)
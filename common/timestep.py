@@ -0,0 +1,62 @@
+"""固定タイムステップ（ゲームの計算は常に 1/60 秒ずつ、描画は出せるだけ）
+
+前回からの経過時間をためておき（accumulator）、1/hz 秒たまるごとに1回ゲームを進める。
+描画が遅れたフレームの次は2回以上進めて追いつき、描画が速い画面（120/144Hz）では
+進めないフレームもある。どちらでもゲームの速さは変わらない。
+
+進めた回数の端数（alpha: 0〜1）は、描画で「前回の位置と今の位置の間」を描くのに使う。
+
+ウィンドウのドラッグやブラウザのタブが裏に回ったときなどで大きく止まると、
+追いつくための計算でさらに遅れる（spiral of death）ので、1フレームで進める回数は max_steps までにして、
+残りは捨てる（dropped に数える）。
+"""
+import time
+
+
+class FixedTimestep:
+    def __init__(self, hz=60, max_steps=5):
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last = None
+
+        # 統計
+        self.frames = 0
+        self.ticks = 0
+        self.extra = 0    # 1フレームで2回目以降に進めた回数（遅れを取り戻した分）
+        self.idle = 0     # 1回も進めなかったフレーム数（描画の方が速い）
+        self.dropped = 0  # 追いつくのをあきらめて捨てた回数
+
+    def advance(self, now=None):
+        """前回からの経過時間ぶん、今回ゲームを何回進めるか"""
+        if now is None:
+            now = time.perf_counter()
+        if self.last is None:
+            self.last = now - self.dt  # 最初のフレームはちょうど1回進める
+        self.accumulator += now - self.last
+        self.last = now
+
+        steps = int(self.accumulator / self.dt + 1e-6)  # 小数の誤差で1回少なくならないように
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        if self.accumulator >= self.dt:
+            self.accumulator %= self.dt  # 捨てた分
+
+        self.frames += 1
+        self.ticks += steps
+        if steps == 0:
+            self.idle += 1
+        else:
+            self.extra += steps - 1
+        return steps
+
+    @property
+    def alpha(self):
+        """前回進めてからどれだけ時間がたったか（次に進めるまでを 1 として）"""
+        return self.accumulator / self.dt
+
+    def stats(self):
+        return (f"{self.ticks} ticks in {self.frames} frames "
+                f"(extra {self.extra}, idle frames {self.idle}, dropped {self.dropped})")
@@ -1,3 +1,6 @@
+import time
+START_NS = time.perf_counter_ns()  # Startup timing starts here, before the other imports
+
 import asyncio
 import pygame
 import sys
@@ -5,14 +8,21 @@ import os
 import random
 import math
 
-# Initialize Pygame
-pygame.init()
+# Make the shared modules in common/ importable
+# (the web build copies common/ into this folder, see build.yml)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.adaptive import AdaptiveQuality, HIGH, LOW
+from common.background import BackgroundLayer
+from common.lazy_font import LazyFont
+from common.profiler import FrameProfiler
+from common.startup import StartupTimer
+from common.text_cache import TextCache
+from common.timestep import FixedTimestep
 
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Character Mover - Ultimate Dodge!")
+SCREEN = None  # Created by init_display() when main() starts
 
 # Colors
 WHITE = (255, 255, 255)
@@ -41,6 +51,37 @@ enemies = []
 items = []
 enemy_spawn_timer = 0
 item_spawn_timer = 0
+text_cache = TextCache(64)  # Rendered text, re-rendered only when the string changes
+
+# Frame profiler (F3 toggles the overlay; --profile shows it from the start,
+# --profile-csv FILE writes every frame's phase times on exit)
+PROFILE = "--profile" in sys.argv
+PROFILE_CSV = sys.argv[sys.argv.index("--profile-csv") + 1] if "--profile-csv" in sys.argv[:-1] else None
+PROFILE_PHASES = ("events", "input", "update", "collision", "draw", "flip", "tick")
+
+# The game always advances in fixed 1/60 s ticks; rendering runs up to RENDER_FPS
+# (--render-fps N, 0 = no cap; the browser paces frames itself)
+TICK_RATE = 60
+MAX_STEPS = 5  # Catch-up ticks allowed per frame before the rest is dropped
+RENDER_FPS = (int(sys.argv[sys.argv.index("--render-fps") + 1]) if "--render-fps" in sys.argv[:-1]
+              else 0 if sys.platform == "emscripten" else 144)
+
+# Adaptive quality (--adaptive; always on in the browser): when frames run late, skip
+# drawing some frames first (the game keeps ticking), then drop the item pulse and the grid
+ADAPTIVE = "--adaptive" in sys.argv or sys.platform == "emscripten"
+
+# Startup timing (--startup prints it, --startup-json FILE appends it; always printed in the browser console)
+STARTUP_REPORT = "--startup" in sys.argv or sys.platform == "emscripten"
+STARTUP_JSON = sys.argv[sys.argv.index("--startup-json") + 1] if "--startup-json" in sys.argv[:-1] else None
+
+def init_display():
+    """Open the window. Only the display and font modules are initialized
+    (pygame.init() would also bring up the mixer and joystick, which we don't use)"""
+    global SCREEN
+    pygame.display.init()
+    pygame.font.init()
+    SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Character Mover - Ultimate Dodge!")
 
 class Enemy:
     def __init__(self, enemy_type='normal'):
@@ -72,6 +113,7 @@ class Enemy:
             self.rect.y = random.randint(0, SCREEN_HEIGHT - self.size)
             self.vel_x = -self.speed
             self.vel_y = random.choice([-2, -1, 0, 1, 2])
+        self.prev_x, self.prev_y = self.rect.x, self.rect.y  # Position before the last update (for interpolation)
 
         if self.type == 'chase':
             self.speed *= 0.4 
@@ -82,6 +124,7 @@ class Enemy:
             self.life_timer = None
 
     def update(self, target_rect):
+        self.prev_x, self.prev_y = self.rect.x, self.rect.y
         if self.type == 'chase' and target_rect:
             dx = target_rect.centerx - self.rect.centerx
             dy = target_rect.centery - self.rect.centery
@@ -97,15 +140,21 @@ class Enemy:
             self.rect.x += self.vel_x
             self.rect.y += self.vel_y
 
-    def draw(self, surface):
+    def draw(self, surface, alpha=1.0):
+        # alpha: where to draw between the previous (0) and current (1) position
         if self.life_timer is not None and self.life_timer < 60:
             if (self.life_timer // 5) % 2 == 0:
                 return
 
-        pygame.draw.ellipse(surface, self.color, self.rect)
+        rect = self.rect
+        if alpha < 1.0:
+            rect = rect.copy()
+            rect.x = int(self.prev_x + (self.rect.x - self.prev_x) * alpha)
+            rect.y = int(self.prev_y + (self.rect.y - self.prev_y) * alpha)
+        pygame.draw.ellipse(surface, self.color, rect)
         if self.type == 'chase':
-            pygame.draw.circle(surface, WHITE, (self.rect.centerx - 5, self.rect.centery - 5), 3)
-            pygame.draw.circle(surface, WHITE, (self.rect.centerx + 5, self.rect.centery - 5), 3)
+            pygame.draw.circle(surface, WHITE, (rect.centerx - 5, rect.centery - 5), 3)
+            pygame.draw.circle(surface, WHITE, (rect.centerx + 5, rect.centery - 5), 3)
 
     def is_expired(self):
         return self.life_timer is not None and self.life_timer <= 0
@@ -126,9 +175,11 @@ class Item:
     def update(self):
         self.timer -= 1
 
-    def draw(self, surface):
-        pulse = abs(math.sin(pygame.time.get_ticks() * 0.01)) * 5
-        draw_rect = self.rect.inflate(pulse, pulse)
+    def draw(self, surface, pulse=True):
+        draw_rect = self.rect
+        if pulse:
+            size = abs(math.sin(pygame.time.get_ticks() * 0.01)) * 5
+            draw_rect = self.rect.inflate(size, size)
         pygame.draw.circle(surface, YELLOW, draw_rect.center, draw_rect.width // 2)
 
 def create_default_character():
@@ -147,6 +198,34 @@ def create_default_character():
     
     return surface
 
+def paint_background(surface):
+    """White background with the grid (static, baked once)"""
+    surface.fill(WHITE)
+    for x in range(0, SCREEN_WIDTH, 50):
+        pygame.draw.line(surface, (240, 240, 240), (x, 0), (x, SCREEN_HEIGHT))
+    for y in range(0, SCREEN_HEIGHT, 50):
+        pygame.draw.line(surface, (240, 240, 240), (0, y), (SCREEN_WIDTH, y))
+
+def update_enemies(target_rect):
+    """Move every enemy and drop the ones that left or expired; returns the points earned"""
+    points = 0
+    for enemy in enemies[:]:
+        enemy.update(target_rect)
+        if enemy.is_off_screen():
+            enemies.remove(enemy)
+            points += 10
+        elif enemy.is_expired():
+            enemies.remove(enemy)
+            points += 5
+    return points
+
+def hits_enemy(hitbox):
+    """True if any enemy overlaps the player's hitbox"""
+    for enemy in enemies:
+        if hitbox.colliderect(enemy.rect):
+            return True
+    return False
+
 def reset_game():
     global enemies, items, score, level, char_rect
     enemies = []
@@ -156,131 +235,159 @@ def reset_game():
     if char_rect:
         char_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
 
+def step(profiler):
+    """Advance the game by one fixed tick"""
+    global game_state, score, level, enemy_spawn_timer, item_spawn_timer
+    level = 1 + score // 1000
+    
+    keys = pygame.key.get_pressed()
+    current_speed = base_speed
+
+    if keys[pygame.K_LEFT] and char_rect.left > 0:
+        char_rect.x -= current_speed
+    if keys[pygame.K_RIGHT] and char_rect.right < SCREEN_WIDTH:
+        char_rect.x += current_speed
+    if keys[pygame.K_UP] and char_rect.top > 0:
+        char_rect.y -= current_speed
+    if keys[pygame.K_DOWN] and char_rect.bottom < SCREEN_HEIGHT:
+        char_rect.y += current_speed
+    profiler.mark("input")
+
+    spawn_rate = max(10, 40 - level * 2)
+    enemy_spawn_timer += 1
+    if enemy_spawn_timer > spawn_rate:
+        e_type = 'chase' if level >= 3 and random.random() < 0.2 else 'normal'
+        enemies.append(Enemy(e_type))
+        enemy_spawn_timer = 0
+    
+    item_spawn_timer += 1
+    if item_spawn_timer > 300:
+        if random.random() < 0.5:
+            items.append(Item())
+        item_spawn_timer = 0
+
+    score += update_enemies(char_rect)
+    profiler.mark("update")
+
+    char_hitbox = char_rect.inflate(-15, -15)
+    if hits_enemy(char_hitbox):
+        game_state = STATE_GAMEOVER
+    
+    for item in items[:]:
+        item.update()
+        if item.timer <= 0:
+            items.remove(item)
+        elif char_hitbox.colliderect(item.rect):
+            items.remove(item)
+            score += 500
+
+    score += 1
+    profiler.mark("collision")
+
 async def main():
     global char_image, char_rect, game_state, score, level, enemies, items
     global enemy_spawn_timer, item_spawn_timer
     
+    startup = StartupTimer(START_NS, STARTUP_REPORT, STARTUP_JSON)
+    startup.mark("import")
+    init_display()
+    startup.mark("init")
+    
     clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 36)
-    title_font = pygame.font.SysFont(None, 64)
+    background = BackgroundLayer(paint_background)
+    # Fonts are loaded on first render. SysFont(None) scanned every system font just to
+    # end up with the default font, so load the default font directly
+    font = LazyFont(36)
+    title_font = LazyFont(64)
     
     # Create default character
     char_image = create_default_character()
     char_rect = char_image.get_rect()
     char_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
 
+    profiler = FrameProfiler(PROFILE_PHASES, PROFILE, PROFILE_CSV)
+    timestep = FixedTimestep(TICK_RATE, MAX_STEPS)
+    adaptive = AdaptiveQuality(TICK_RATE, ADAPTIVE, verbose=ADAPTIVE)
     running = True
     while running:
+        profiler.begin_frame()
+        adaptive.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
             
             if game_state == STATE_TITLE or game_state == STATE_GAMEOVER:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     if char_image:
                         game_state = STATE_PLAYING
                         reset_game()
+        startup.events_handled()
+        profiler.mark("events")
 
-        if game_state == STATE_PLAYING and char_rect:
-            level = 1 + score // 1000
-            
-            keys = pygame.key.get_pressed()
-            current_speed = base_speed
-
-            if keys[pygame.K_LEFT] and char_rect.left > 0:
-                char_rect.x -= current_speed
-            if keys[pygame.K_RIGHT] and char_rect.right < SCREEN_WIDTH:
-                char_rect.x += current_speed
-            if keys[pygame.K_UP] and char_rect.top > 0:
-                char_rect.y -= current_speed
-            if keys[pygame.K_DOWN] and char_rect.bottom < SCREEN_HEIGHT:
-                char_rect.y += current_speed
-
-            spawn_rate = max(10, 40 - level * 2)
-            enemy_spawn_timer += 1
-            if enemy_spawn_timer > spawn_rate:
-                e_type = 'chase' if level >= 3 and random.random() < 0.2 else 'normal'
-                enemies.append(Enemy(e_type))
-                enemy_spawn_timer = 0
-            
-            item_spawn_timer += 1
-            if item_spawn_timer > 300:
-                if random.random() < 0.5:
-                    items.append(Item())
-                item_spawn_timer = 0
-
-            char_hitbox = char_rect.inflate(-15, -15)
-            for enemy in enemies[:]:
-                enemy.update(char_rect)
-                should_remove = False
-                if enemy.is_off_screen():
-                    should_remove = True
-                    score += 10
-                elif enemy.is_expired():
-                    should_remove = True
-                    score += 5
-                
-                if should_remove:
-                    enemies.remove(enemy)
-                elif char_hitbox.colliderect(enemy.rect):
-                    game_state = STATE_GAMEOVER
-            
-            for item in items[:]:
-                item.update()
-                if item.timer <= 0:
-                    items.remove(item)
-                elif char_hitbox.colliderect(item.rect):
-                    items.remove(item)
-                    score += 500
-
-            score += 1
+        for _ in range(timestep.advance()):
+            if game_state == STATE_PLAYING and char_rect:
+                step(profiler)
+        alpha = timestep.alpha
 
-        SCREEN.fill(WHITE)
-        
-        for x in range(0, SCREEN_WIDTH, 50):
-            pygame.draw.line(SCREEN, (240, 240, 240), (x, 0), (x, SCREEN_HEIGHT))
-        for y in range(0, SCREEN_HEIGHT, 50):
-            pygame.draw.line(SCREEN, (240, 240, 240), (0, y), (SCREEN_WIDTH, y))
+        if adaptive.should_render():
+            if adaptive.quality > LOW:
+                background.draw(SCREEN)
+            else:
+                SCREEN.fill(WHITE)  # No grid
 
-        if char_image:
-            SCREEN.blit(char_image, char_rect)
+            if char_image:
+                SCREEN.blit(char_image, char_rect)
         
-        if game_state == STATE_TITLE:
-            title_text = title_font.render("Ultimate Dodge!", True, BLACK)
-            start_text = font.render("Press SPACE to Start", True, BLUE)
-            instr_text = font.render("Use Arrow Keys to Move", True, GRAY)
+            if game_state == STATE_TITLE:
+                title_text = text_cache.render(title_font, "Ultimate Dodge!", BLACK)
+                start_text = text_cache.render(font, "Press SPACE to Start", BLUE)
+                instr_text = text_cache.render(font, "Use Arrow Keys to Move", GRAY)
             
-            SCREEN.blit(title_text, title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60)))
-            SCREEN.blit(start_text, start_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20)))
-            SCREEN.blit(instr_text, instr_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60)))
-
-        elif game_state == STATE_PLAYING:
-            for item in items:
-                item.draw(SCREEN)
-            for enemy in enemies:
-                enemy.draw(SCREEN)
+                SCREEN.blit(title_text, title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60)))
+                SCREEN.blit(start_text, start_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20)))
+                SCREEN.blit(instr_text, instr_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60)))
+
+            elif game_state == STATE_PLAYING:
+                for item in items:
+                    item.draw(SCREEN, pulse=adaptive.quality == HIGH)
+                for enemy in enemies:
+                    enemy.draw(SCREEN, alpha)
             
-            score_text = font.render(f"Score: {score}", True, BLACK)
-            level_text = font.render(f"Level: {level}", True, RED)
-            SCREEN.blit(score_text, (10, 10))
-            SCREEN.blit(level_text, (10, 40))
-
-        elif game_state == STATE_GAMEOVER:
-            for enemy in enemies:
-                enemy.draw(SCREEN)
+                score_text = text_cache.render(font, f"Score: {score}", BLACK)
+                level_text = text_cache.render(font, f"Level: {level}", RED)
+                SCREEN.blit(score_text, (10, 10))
+                SCREEN.blit(level_text, (10, 40))
+
+            elif game_state == STATE_GAMEOVER:
+                for enemy in enemies:
+                    enemy.draw(SCREEN)
                 
-            over_text = title_font.render("GAME OVER", True, RED)
-            score_text = font.render(f"Final Score: {score}", True, BLACK)
-            retry_text = font.render("Press SPACE to Retry", True, BLUE)
+                over_text = text_cache.render(title_font, "GAME OVER", RED)
+                score_text = text_cache.render(font, f"Final Score: {score}", BLACK)
+                retry_text = text_cache.render(font, "Press SPACE to Retry", BLUE)
             
-            SCREEN.blit(over_text, over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50)))
-            SCREEN.blit(score_text, score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10)))
-            SCREEN.blit(retry_text, retry_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50)))
+                SCREEN.blit(over_text, over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50)))
+                SCREEN.blit(score_text, score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10)))
+                SCREEN.blit(retry_text, retry_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50)))
 
-        pygame.display.flip()
-        clock.tick(60)
+            profiler.draw(SCREEN, font)
+            profiler.mark("draw")
+            pygame.display.flip()
+            startup.presented()
+        profiler.mark("flip")
+        adaptive.presented()
+        adaptive.end_frame(clock.tick(RENDER_FPS))
+        profiler.mark("tick")
+        profiler.end_frame()
         await asyncio.sleep(0)  # Essential for pygbag
 
+    profiler.close()
+    if timestep.extra or timestep.dropped:
+        print(f"Fixed timestep: {timestep.stats()}")
+    if ADAPTIVE:
+        print(f"Adaptive quality: {adaptive.telemetry()}")
     pygame.quit()
     sys.exit()
 
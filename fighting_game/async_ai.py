@@ -0,0 +1,65 @@
+"""敵AIの思考を別スレッドで行う
+
+メインループは「今のフレーム番号」と両者のコピー（スナップショット）を渡すだけで先に進み、
+思考の結果はフレーム番号付きで返ってくる。結果は渡したフレームから latency フレーム後に
+使えるようになる（人間の反応の遅れと同じ。短いほど強い）。
+
+スレッドで考えると、結果がいつ返ってくるかは実行環境の速さで変わる。
+ヘッドレス実行やリプレイでは同じ結果にならないと困るので、threaded=False にして
+その場で考え、結果をちょうど latency フレーム後に使う。
+ブラウザ版（pygbag）はスレッドが使えないので、こちらも同じくその場で考える。
+"""
+import queue
+import threading
+
+
+class DecisionWorker:
+    """think(snapshot) を呼んで判断を返す。threaded=True なら別スレッドで呼ぶ"""
+
+    def __init__(self, think, latency, threaded=True):
+        self.think = think
+        self.latency = latency
+        self.threaded = threaded
+        self.results = []  # (frame, decision) を届いた順に
+        self.lock = threading.Lock()
+
+        # 統計
+        self.posted = 0
+        self.late = 0  # latency フレームを過ぎても届いていなかった回数
+
+        if threaded:
+            self.requests = queue.Queue()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def post(self, frame, snapshot):
+        """frame 時点のスナップショットについて考えてもらう"""
+        self.posted += 1
+        if self.threaded:
+            self.requests.put((frame, snapshot))
+        else:
+            self.results.append((frame, self.think(snapshot)))
+
+    def poll(self, frame):
+        """frame で使ってよい一番新しい判断（なければ None）"""
+        with self.lock:
+            decision = None
+            while self.results and self.results[0][0] + self.latency <= frame:
+                posted_at, decision = self.results.pop(0)
+                if posted_at + self.latency < frame:
+                    self.late += 1
+            return decision
+
+    def close(self):
+        if self.threaded:
+            self.requests.put(None)
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            frame, snapshot = request
+            decision = self.think(snapshot)
+            with self.lock:
+                self.results.append((frame, decision))
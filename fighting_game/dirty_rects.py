@@ -0,0 +1,78 @@
+"""ダーティ矩形描画（変わった部分だけ画面に送る）
+
+画面全体は毎フレーム今まで通り描くが、pygame.display.flip() で全画面を送る代わりに、
+動いたもの・変わったものの「前の位置」と「今の位置」だけを pygame.display.update(rects) で送る。
+変わった面積が大きいときは、普通に flip() した方が速いので全画面に戻す。
+"""
+import pygame
+
+
+class DirtyRectRenderer:
+    """フレームごとに mark() された領域を覚えて、前フレームとの差分だけを画面に送る
+
+    mark(key, rect)          動くもの（毎フレーム必ず送る）
+    mark(key, rect, version) HUDなど。version が前フレームと同じなら送らない
+    invalidate()             次のフレームは全画面を送る（画面の切り替え時など）
+    """
+
+    def __init__(self, screen_size, full_ratio=0.35):
+        self.screen_area = screen_size[0] * screen_size[1]
+        self.full_ratio = full_ratio
+        self.debug = False  # 送った矩形を枠で表示する
+
+        self.prev = {}  # key -> (rect, version)
+        self.current = {}
+        self.full_redraw = True
+        self.last_debug_rects = []
+
+        # 統計
+        self.frames = 0
+        self.full_flips = 0
+        self.last_dirty_area = 0
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def mark(self, key, rect, version=None):
+        self.current[key] = (pygame.Rect(rect), version)
+
+    def collect(self):
+        dirty = []
+        for key, (rect, version) in self.current.items():
+            old = self.prev.get(key)
+            if old is None:
+                dirty.append(rect)
+            elif version is None or old != (rect, version):
+                dirty.append(rect)
+                if old[0] != rect:
+                    dirty.append(old[0])
+        for key, (rect, _) in self.prev.items():
+            if key not in self.current:
+                dirty.append(rect)  # 消えたもの（飛び道具など）の跡を消す
+        return dirty
+
+    def present(self, surface):
+        changed = self.collect()
+        dirty = changed
+        if self.debug:
+            # 前フレームの枠を消すために、その場所も送る
+            dirty = changed + self.last_debug_rects
+
+        area = sum(r.width * r.height for r in dirty)
+        self.last_dirty_area = area
+        self.frames += 1
+
+        if self.debug:
+            for r in changed:
+                pygame.draw.rect(surface, (255, 0, 255), r, 1)
+            self.last_debug_rects = changed
+
+        if self.full_redraw or area > self.screen_area * self.full_ratio:
+            pygame.display.flip()
+            self.full_flips += 1
+            self.full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
+
+        self.prev = self.current
+        self.current = {}
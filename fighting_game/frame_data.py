@@ -0,0 +1,141 @@
+"""技のフレームデータ
+
+Fighter は「今どの技を出しているか」を Action ひとつで持ち、
+技ごとの発生・持続・硬直フレームや判定の位置はこの表から引く。
+技を調整・追加するときは MOVES を書き換えるだけでよい（Fighter のコードは触らない）。
+
+MOVES の各項目（省略したものは DEFAULTS の値）:
+
+    startup   攻撃判定が出るまでのフレーム数
+    active    攻撃判定が出ているフレーム数
+    recovery  判定が消えてから次の行動ができるまでのフレーム数
+    hitbox    右向きのときの攻撃判定 (x, y, 幅, 高さ)。x, y は足元中央からの位置。左向きは左右反転
+    hurtbox   喰らい判定 (x, y, 幅, 高さ)
+    damage    攻撃が当たったときのダメージ（power 倍率をかける前）
+    held      ボタンを押している間だけ続く技（ガード）。時間では終わらない
+    can_move  この状態で左右に歩けるか
+    can_jump  この状態からジャンプできるか
+    ground    地上でしか出せないか
+    lunge     出した瞬間の前方向の速度（移動速度の何倍か）
+    friction  この状態での横方向の減速率
+    turn      相手の方を向き直すか
+"""
+from enum import IntEnum
+
+import pygame
+
+
+class Action(IntEnum):
+    IDLE = 0
+    GUARD = 1
+    PUNCH = 2
+    KICK = 3
+    SLIDE = 4
+    SHOOT = 5
+
+
+STAND_HURTBOX = (-25, -100, 50, 100)
+
+DEFAULTS = {
+    "startup": 0,
+    "active": 0,
+    "recovery": 0,
+    "hitbox": None,
+    "hurtbox": STAND_HURTBOX,
+    "damage": 0,
+    "held": False,
+    "can_move": False,
+    "can_jump": False,
+    "ground": False,
+    "lunge": 0,
+    "friction": 0.8,
+    "turn": True,
+}
+
+MOVES = {
+    "IDLE": {"can_move": True, "can_jump": True},
+    "GUARD": {"held": True, "ground": True},
+    "PUNCH": {"startup": 5, "active": 9, "recovery": 6, "hitbox": (20, -70, 50, 30), "damage": 10,
+              "can_jump": True},
+    "KICK": {"startup": 5, "active": 19, "recovery": 6, "hitbox": (20, -50, 70, 40), "damage": 15,
+             "can_jump": True},
+    "SLIDE": {"startup": 5, "active": 24, "recovery": 11, "hitbox": (10, -30, 80, 30), "damage": 12,
+              "hurtbox": (-25, -50, 50, 50), "ground": True, "lunge": 2, "friction": 0.95, "turn": False},
+    "SHOOT": {"recovery": 30},
+}
+
+
+class MoveData:
+    """1つの技のフレームデータ（表から作ったあとは変更しない）"""
+
+    def __init__(self, action, spec):
+        data = dict(DEFAULTS)
+        unknown = set(spec) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown frame data for {action.name}: {sorted(unknown)}")
+        data.update(spec)
+
+        self.action = action
+        self.startup = data["startup"]
+        self.active = data["active"]
+        self.recovery = data["recovery"]
+        self.duration = self.startup + self.active + self.recovery
+        self.damage = data["damage"]
+        self.held = data["held"]
+        self.can_move = data["can_move"]
+        self.can_jump = data["can_jump"]
+        self.ground = data["ground"]
+        self.lunge = data["lunge"]
+        self.friction = data["friction"]
+        self.turn = data["turn"]
+
+        # action_timer は duration から減っていくので、判定が出ている間の timer の範囲にしておく
+        self.active_max = self.duration - self.startup        # この値より小さく
+        self.active_min = self.active_max - self.active        # この値以上のとき判定が出る
+
+        # 向きごとのオフセット。[facing_right] で引く（False=左向き, True=右向き）
+        hitbox = data["hitbox"]
+        if hitbox:
+            x, y, w, h = hitbox
+            self.hitbox = ((-x - w, y, w, h), (x, y, w, h))
+        else:
+            self.hitbox = None
+        self.hurtbox = data["hurtbox"]
+
+    def hit_active(self, timer):
+        return self.hitbox is not None and self.active_min <= timer < self.active_max
+
+
+def build_table(moves):
+    """MOVES のような定義から、Action の値で引ける MoveData のリストを作る"""
+    table = [None] * len(Action)
+    for name, spec in moves.items():
+        action = Action[name]
+        table[action] = MoveData(action, spec)
+    missing = [a.name for a in Action if table[a] is None]
+    if missing:
+        raise ValueError(f"frame data missing for {missing}")
+    return table
+
+
+FRAME_DATA = build_table(MOVES)
+
+
+class Hitboxes:
+    """1人分の攻撃判定・喰らい判定の Rect。毎回作らずに位置だけ書き換えて使う"""
+
+    def __init__(self):
+        self.attack = pygame.Rect(0, 0, 0, 0)
+        self.hurt = pygame.Rect(0, 0, 0, 0)
+
+    def attack_rect(self, move, timer, x, y, facing_right):
+        if not move.hit_active(timer):
+            return None
+        dx, dy, w, h = move.hitbox[facing_right]
+        self.attack.update(x + dx, y + dy, w, h)
+        return self.attack
+
+    def hurt_rect(self, move, x, y):
+        dx, dy, w, h = move.hurtbox
+        self.hurt.update(x + dx, y + dy, w, h)
+        return self.hurt
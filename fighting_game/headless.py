@@ -0,0 +1,150 @@
+"""格闘ゲームのヘッドレス実行（ウィンドウなし・最速シミュレーション）
+
+バランス調整やCI用に、画面を作らずに Game.update() / check_collision() を回す。
+同じシード・同じ入力スクリプトなら必ず同じ結果になる。
+
+    python fighting_game/headless.py --char POWER --level 3 --seed 1 --rounds 200
+"""
+import argparse
+import sys
+import time
+
+import main as fighting
+from main import NO_INPUT
+
+ROUND_FRAMES = 60 * fighting.FPS + 1  # 1ラウンドの最大フレーム数（時間切れまで）
+
+
+class HeadlessMatch:
+    """画面なしで1ステージ分の対戦を進めるクラス
+
+    script: プレイヤーの入力。フレームごとの入力辞書のリスト、
+            または (frame, game) を受け取って入力辞書を返す関数。
+    player_ai_level: 指定するとプレイヤー側も EnemyAI に操作させる。
+    ai: 敵AIの種類（fighting.AI_TIERS のキー）
+    ai_latency: 指定すると敵AIをそのフレーム数だけ遅れて反応させる（AsyncEnemyAI。ヘッドレスでは同じスレッドで考える）
+    """
+
+    def __init__(self, char="BALANCE", level=1, seed=0, script=None, player_ai_level=None, skip_intro=True,
+                 ai="heuristic", ai_latency=None):
+        self.level = level
+        self.game = fighting.Game(seed=seed, realtime=False, ai=ai, ai_latency=ai_latency)
+        self.game.selected_char = char
+        self.game.start_game(level)
+        if skip_intro:
+            self.game.start_delay = 0
+
+        # ステージクリア後に reset_round() で差し替えられても結果を読めるよう保持しておく
+        self.player = self.game.player
+        self.enemy = self.game.enemy
+
+        self.script = script
+        self.player_ai = None
+        if player_ai_level is not None:
+            # プレイヤー側は ai_params.json の調整に左右されないよう、式どおりのパラメータで動かす
+            params = fighting.default_ai_params(player_ai_level)
+            self.player_ai = fighting.EnemyAI(self.player, player_ai_level, self.game, params)
+        self.frame = 0
+
+    def finished(self):
+        game = self.game
+        return game.game_over or game.current_level != self.level
+
+    def next_inputs(self):
+        if self.script is None:
+            return NO_INPUT
+        if callable(self.script):
+            return self.script(self.frame, self.game)
+        if self.frame < len(self.script):
+            return self.script[self.frame]
+        return NO_INPUT
+
+    def step(self, inputs=None):
+        """1フレーム進める"""
+        if self.player_ai:
+            self.player_ai.update(self.enemy)
+        else:
+            self.game.handle_game_input(inputs if inputs is not None else self.next_inputs())
+        self.game.update()
+        self.frame += 1
+
+    def run_round(self, max_frames=ROUND_FRAMES):
+        """決着がつくまで（または max_frames まで）進めて結果を返す"""
+        while self.frame < max_frames and not self.finished():
+            self.step()
+        return self.result()
+
+    def result(self):
+        if self.player.health > self.enemy.health:
+            winner = "player"
+        elif self.enemy.health > self.player.health:
+            winner = "enemy"
+        else:
+            winner = None
+        return {
+            "winner": winner,
+            "frames": self.frame,
+            "player_health": self.player.health,
+            "enemy_health": self.enemy.health,
+            "damage_dealt": self.enemy.max_health - self.enemy.health,
+            "damage_taken": self.player.max_health - self.player.health,
+        }
+
+
+def simulate_round(char="BALANCE", level=1, seed=0, script=None, player_ai_level=None, max_frames=ROUND_FRAMES,
+                   ai="heuristic", ai_latency=None):
+    return HeadlessMatch(char, level, seed, script, player_ai_level, ai=ai, ai_latency=ai_latency).run_round(max_frames)
+
+
+def state_digest(game):
+    """再現性チェック用に、対戦状態を比較できる形にまとめる"""
+    fighters = []
+    for f in (game.player, game.enemy):
+        fighters.append((f.x, f.y, f.vel_x, f.vel_y, f.health, f.action_timer,
+                         f.is_jumping, f.is_punching, f.is_kicking, f.is_sliding,
+                         f.is_guarding, f.is_shooting))
+    projectiles = [(p.x, p.y, p.life) for p in game.projectiles]
+    return (tuple(fighters), tuple(projectiles), game.round_time, game.frame_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless fighting game simulation")
+    parser.add_argument("--char", default="BALANCE", choices=list(fighting.CHAR_TYPES))
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--player-ai", type=int, default=3, help="プレイヤー側AIのレベル")
+    parser.add_argument("--ai", default="heuristic", choices=list(fighting.AI_TIERS), help="敵AIの種類")
+    parser.add_argument("--ai-latency", type=int, default=None, help="敵AIの反応の遅れ（フレーム数）")
+    parser.add_argument("--verify", action="store_true", help="同じシードで2回実行して結果が一致するか確認")
+    args = parser.parse_args()
+
+    wins = 0
+    total_frames = 0
+    start = time.perf_counter()
+    for i in range(args.rounds):
+        result = simulate_round(args.char, args.level, args.seed + i, player_ai_level=args.player_ai, ai=args.ai,
+                                ai_latency=args.ai_latency)
+        wins += result["winner"] == "player"
+        total_frames += result["frames"]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{args.char} vs Lv.{args.level}: win {wins}/{args.rounds}")
+    print(f"{total_frames} frames in {elapsed_ms:.1f} ms ({total_frames / max(elapsed_ms, 1e-9):.1f} frames/ms)")
+
+    if args.verify:
+        a = HeadlessMatch(args.char, args.level, args.seed, player_ai_level=args.player_ai, ai=args.ai,
+                          ai_latency=args.ai_latency)
+        b = HeadlessMatch(args.char, args.level, args.seed, player_ai_level=args.player_ai, ai=args.ai,
+                          ai_latency=args.ai_latency)
+        while not a.finished():
+            a.step()
+            b.step()
+            if state_digest(a.game) != state_digest(b.game):
+                print(f"MISMATCH at frame {a.frame}")
+                sys.exit(1)
+        print(f"deterministic: {a.frame} frames identical")
+
+
+if __name__ == "__main__":
+    main()
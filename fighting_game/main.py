@@ -1,16 +1,39 @@
+import time
+START_NS = time.perf_counter_ns()  # 起動時間の計測用（ほかの import より前に取る）
+
 import asyncio
+import copy
+import json
+import os
 import pygame
 import sys
 import random
 
-# 初期化
-pygame.init()
+# 両方のゲームで使う共通モジュール (common/) を読み込めるようにする
+# Web版のビルドでは common/ をこのフォルダにコピーしている（build.yml 参照）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.adaptive import AdaptiveQuality, HIGH
+from common.background import BackgroundLayer
+from common.glyph_atlas import GlyphFont, atlas_exists
+from common.lazy_font import LazyFont
+from common.profiler import FrameProfiler, NullProfiler
+from common.startup import StartupTimer
+from common.surface_cache import SurfaceCache
+from common.text_cache import TextCache
+from common.timestep import FixedTimestep
+from async_ai import DecisionWorker
+from dirty_rects import DirtyRectRenderer
+from frame_data import FRAME_DATA, Action, Hitboxes
+from motion_input import CommandMatcher, compile_command
+from overlays import OverlayManager
+from projectiles import ProjectilePool
+from replay import ReplayReader, ReplayWriter, seek, start_playback
+from search_ai import RolloutPlanner
 
 # 画面設定
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Fighting Game - Battle Royale")
+screen = None  # init_display() で作成（ヘッドレス実行では作らない）
 
 # 色定義
 SKY_BLUE = (135, 206, 250)
@@ -33,17 +56,101 @@ GREEN = (0, 255, 0)
 def get_font(size):
     return pygame.font.Font(None, size)
 
-font_small = get_font(32)
-font_medium = get_font(48)
-font_large = get_font(72)
+# 日本語のグリフアトラス（tools/build_glyph_atlas.py で作る）があれば、それで日本語を表示する
+FONT_SIZES = (32, 48, 72)
+GLYPH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+LANG = "ja" if all(atlas_exists(GLYPH_DIR, size) for size in FONT_SIZES) else "en"
+
+# 画面に出す文章（LANG で切り替える）
+UI_TEXT = {
+    "en": {
+        "guide": "Move:Arrow  Attack:Z/X  Guard:Down  Hadoken:Down->Fwd+Z",
+        "reached": "Reached Stage: {level}",
+        "retry": "Press R to Select Character",
+        "congrats": "Congratulations! You won!",
+    },
+    "ja": {
+        "guide": "移動:矢印  攻撃:Z/X  ガード:下  波動拳:下→前+Z",
+        "reached": "到達ステージ: {level}",
+        "retry": "Rキーでキャラ選択へ",
+        "congrats": "おめでとうございます！完全制覇です！",
+    },
+}
+
+def ui_text(key, **values):
+    return UI_TEXT[LANG][key].format(**values)
+
+def make_font(size):
+    # 最初に文字を描くときに作る（起動を速くするため）
+    if LANG == "ja":
+        return GlyphFont(GLYPH_DIR, size)
+    return LazyFont(size, get_font)
+
+font_small = make_font(32)
+font_medium = make_font(48)
+font_large = make_font(72)
+text_cache = TextCache(256)  # HUDなどの文字列は変わったときだけ描き直す
+
+def init_display():
+    """ウィンドウを作成する（描画するときだけ呼ぶ）
+
+    pygame.init() は音やジョイスティックまで初期化するので、使う画面とフォントだけ初期化する。
+    """
+    global screen
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Fighting Game - Battle Royale")
 
 # FPS設定
 clock = pygame.time.Clock()
 FPS = 60
 
+# ダーティ矩形描画（python main.py --dirty-rects で有効、F2で矩形を表示）
+USE_DIRTY_RECTS = "--dirty-rects" in sys.argv
+
+
+def get_arg(name):
+    """コマンドライン引数 name の次の値（なければ None）"""
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
+
+
+# リプレイ（python main.py --record replays で記録、--replay ファイル で再生）
+RECORD_DIR = get_arg("--record")
+REPLAY_PATH = get_arg("--replay")
+REPLAY_SEEK_FRAMES = 600  # 再生中に ← → で移動するフレーム数（10秒）
+
+# フレームの処理時間（F3 で表示。--profile で最初から表示、--profile-csv ファイル で終了時に書き出す）
+PROFILE = "--profile" in sys.argv
+PROFILE_CSV = get_arg("--profile-csv")
+PROFILE_PHASES = ("events", "input", "update", "collision", "draw", "flip", "tick")
+
+# 描画の上限FPS（ゲームの計算は FPS で固定。--render-fps 0 で上限なし。ブラウザ版は画面の更新に任せる）
+RENDER_FPS = int(get_arg("--render-fps") or (0 if sys.platform == "emscripten" else 144))
+MAX_STEPS = 5  # 1フレームで追いつくために進める回数の上限
+
+# 重いときに描画を間引き、顔の線や弾の模様を省く（--adaptive。ブラウザ版は常に有効）
+ADAPTIVE = "--adaptive" in sys.argv or sys.platform == "emscripten"
+
+# 起動時間の表示（--startup で表示、--startup-json ファイル で追記。ブラウザ版はコンソールに常に出す）
+STARTUP_REPORT = "--startup" in sys.argv or sys.platform == "emscripten"
+STARTUP_JSON = get_arg("--startup-json")
+
+# 敵AIの種類（heuristic: 確率で行動を選ぶ, search: 先読みで選ぶ）
+AI_TIER = get_arg("--ai") or "heuristic"
+# --ai-latency N で敵AIの思考を別スレッドで行い、N フレーム遅れで反応させる（小さいほど強い）
+AI_LATENCY = int(get_arg("--ai-latency")) if get_arg("--ai-latency") else None
+
 # ゲーム設定
 GRAVITY = 0.6
 GROUND_Y = 480
+SPECIAL_MOVE_WINDOW = 30  # コマンド入力の受付時間（フレーム数, 0.5秒）
+STAGE_CLEAR_FRAMES = 120  # ステージクリア表示の長さ（2秒）
+FRAME_SPIKE_MS = 50  # これより長いフレームを「引っかかり」として数える
 
 # キャラクタータイプ定義
 CHAR_TYPES = {
@@ -61,8 +168,32 @@ CHAR_TYPES = {
     }
 }
 
+# 必殺技コマンド（表記は motion_input.py を参照）。起動時に一度だけ状態機械に変換する
+SPECIAL_MOVES = [
+    compile_command("hadoken", "26", window=SPECIAL_MOVE_WINDOW),  # 下 → 前
+]
+
+# プレイヤー入力のキー（1フレームの入力は1バイトに詰められる）
+INPUT_KEYS = ("UP", "DOWN", "LEFT", "RIGHT", "Z", "X", "SPACE", "R")
+NO_INPUT = {key: False for key in INPUT_KEYS}
+
+def pack_inputs(inputs):
+    bits = 0
+    for i, key in enumerate(INPUT_KEYS):
+        if inputs[key]:
+            bits |= 1 << i
+    return bits
+
+def unpack_inputs(bits):
+    return {key: bool(bits & (1 << i)) for i, key in enumerate(INPUT_KEYS)}
+
 class Projectile:
-    def __init__(self, x, y, facing_right, owner):
+    def __init__(self, x=0, y=0, facing_right=True, owner=None):
+        self.rect = pygame.Rect(0, 0, 0, 0)  # 当たり判定用。作り直さずに使い回す
+        self.reset(x, y, facing_right, owner)
+
+    def reset(self, x, y, facing_right, owner):
+        """プールから取り出して撃ち直すときに呼ぶ"""
         self.x = x
         self.y = y
         self.facing_right = facing_right
@@ -79,22 +210,37 @@ class Projectile:
         if self.life <= 0 or self.x < -50 or self.x > SCREEN_WIDTH + 50:
             self.active = False
             
-    def draw(self, screen):
+    def draw(self, screen, detail=True):
         pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-        pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius - 5)
+        if detail:
+            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius - 5)
         
     def get_rect(self):
-        return pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius * 2, self.radius * 2)
+        self.rect.update(self.x - self.radius, self.y - self.radius, self.radius * 2, self.radius * 2)
+        return self.rect
+
+    def snapshot(self):
+        state = self.__dict__.copy()
+        del state["rect"]  # Rect は get_rect() で作り直せるので保存しない
+        return state
+
+    def restore(self, state):
+        self.__dict__.update(state)
 
 class Fighter:
     """ファイタークラス"""
     
-    def __init__(self, x, player_num, char_type_name="BALANCE", level=1):
+    def __init__(self, x, player_num, char_type_name="BALANCE", level=1, human=None):
+        # human: 人が操作するキャラか（省略時は 1P だけ）。対人戦では 2P も True にする
+        if human is None:
+            human = (player_num == 1)
         self.player_num = player_num
         self.level = level
         self.char_type = CHAR_TYPES[char_type_name]
         self.x = x
         self.y = GROUND_Y
+        self.prev_x = x  # 前の update 前の位置（固定タイムステップの描画の補間用）
+        self.prev_y = GROUND_Y
         self.vel_y = 0
         self.vel_x = 0
         
@@ -103,10 +249,10 @@ class Fighter:
         self.jump_power = self.char_type["jump"]
         self.power_mult = self.char_type["power"]
         
-        if player_num == 1:
+        if human:
             self.body_color = self.char_type["color"]
             self.detail_color = self.char_type["detail"]
-            self.name = f"P1 ({char_type_name})"
+            self.name = f"P{player_num} ({char_type_name})"
         else:
             # 敵の見た目調整
             if level == 5:
@@ -126,7 +272,7 @@ class Fighter:
         self.width = 50
         self.height = 100
         
-        if player_num == 1:
+        if human:
             self.max_health = self.char_type["hp"]
         else:
             self.max_health = base_hp
@@ -135,71 +281,72 @@ class Fighter:
         self.facing_right = (player_num == 1)
         
         self.is_jumping = False
-        self.is_punching = False
-        self.is_kicking = False
-        self.is_sliding = False
-        self.is_guarding = False
-        self.is_shooting = False
+        self.action = Action.IDLE  # 今出している技（技の性能は frame_data.py の表を見る）
+        self.hitboxes = Hitboxes()
         
         self.action_timer = 0
         self.hit_cooldown = 0
         self.damage_flash = 0
         self.shoot_cooldown = 0
         
-        # コマンド入力用バッファ [(frame_count, input_mask), ...]
-        # input_mask: 1=UP, 2=DOWN, 4=LEFT, 8=RIGHT
-        self.input_buffer = []
-        self.buffer_timer = 0
-        
+        # コマンド入力用（input_mask: 1=UP, 2=DOWN, 4=LEFT, 8=RIGHT）
+        # 時刻ではなくフレーム番号で記録するので、同じ入力なら必ず同じ結果になる
+        self.input_frame = 0
+        self.commands = CommandMatcher(SPECIAL_MOVES)
+        
+    # 以前の is_xxx フラグは action から求める（AI や描画はこちらを見ている）
+    is_punching = property(lambda self: self.action == Action.PUNCH)
+    is_kicking = property(lambda self: self.action == Action.KICK)
+    is_sliding = property(lambda self: self.action == Action.SLIDE)
+    is_guarding = property(lambda self: self.action == Action.GUARD)
+    is_shooting = property(lambda self: self.action == Action.SHOOT)
+    
+    def start_action(self, action):
+        """技を出す。今の状態から出せなければ False"""
+        move = FRAME_DATA[action]
+        if self.action != Action.IDLE and not (move.held and self.action == action):
+            return False
+        if move.ground and self.is_jumping:
+            return False
+        self.action = action
+        if not move.held:
+            self.action_timer = move.duration
+        speed = self.move_speed * move.lunge
+        self.vel_x = speed if self.facing_right else -speed
+        return True
+    
     def move(self, direction):
-        if not self.is_punching and not self.is_kicking and not self.is_guarding and not self.is_shooting:
-            if not self.is_sliding:
-                self.vel_x = direction * self.move_speed
+        if FRAME_DATA[self.action].can_move:
+            self.vel_x = direction * self.move_speed
     
     def jump(self):
-        if not self.is_jumping and not self.is_sliding and not self.is_guarding and not self.is_shooting:
+        if not self.is_jumping and FRAME_DATA[self.action].can_jump:
             self.vel_y = self.jump_power
             self.is_jumping = True
     
     def punch(self):
-        if not self.is_punching and not self.is_kicking and not self.is_sliding and not self.is_guarding and not self.is_shooting:
-            self.is_punching = True
-            self.action_timer = 20
-            self.vel_x = 0
+        self.start_action(Action.PUNCH)
     
     def kick(self):
-        if not self.is_kicking and not self.is_punching and not self.is_sliding and not self.is_guarding and not self.is_shooting:
-            self.is_kicking = True
-            self.action_timer = 30
-            self.vel_x = 0
+        self.start_action(Action.KICK)
             
     def slide(self):
-        if not self.is_sliding and not self.is_jumping and not self.is_punching and not self.is_kicking and not self.is_guarding and not self.is_shooting:
-            self.is_sliding = True
-            self.action_timer = 40
-            speed = self.move_speed * 2
-            self.vel_x = speed if self.facing_right else -speed
+        self.start_action(Action.SLIDE)
 
     def guard(self, active):
         if active:
-            if not self.is_jumping and not self.is_punching and not self.is_kicking and not self.is_sliding and not self.is_shooting:
-                self.is_guarding = True
-                self.vel_x = 0
-        else:
-            self.is_guarding = False
+            self.start_action(Action.GUARD)
+        elif self.action == Action.GUARD:
+            self.action = Action.IDLE
 
     def shoot(self, game_ref):
-        if self.shoot_cooldown == 0 and not self.is_punching and not self.is_kicking and not self.is_sliding and not self.is_guarding and not self.is_shooting:
-            self.is_shooting = True
-            self.action_timer = 30
-            self.vel_x = 0
+        if self.shoot_cooldown == 0 and self.start_action(Action.SHOOT):
             self.shoot_cooldown = 60
             
             # 飛び道具生成
             proj_x = self.x + (40 if self.facing_right else -40)
             proj_y = self.y - 60
-            proj = Projectile(proj_x, proj_y, self.facing_right, self)
-            game_ref.projectiles.append(proj)
+            game_ref.projectiles.spawn(proj_x, proj_y, self.facing_right, self)
 
     def update_input(self, inputs):
         # inputs: {"UP": bool, "DOWN": bool, "LEFT": bool, "RIGHT": bool}
@@ -209,41 +356,18 @@ class Fighter:
         if inputs["LEFT"]: mask |= 4
         if inputs["RIGHT"]: mask |= 8
         
-        # 同じ入力が続いている場合は追加しない（または一定間隔で追加）
-        # ここではシンプルに変化があった時と、一定時間経過で追加
-        self.buffer_timer += 1
-        if not self.input_buffer or self.input_buffer[-1][1] != mask or self.buffer_timer > 5:
-            self.input_buffer.append((pygame.time.get_ticks(), mask))
-            if len(self.input_buffer) > 20: # 履歴は最新20個まで
-                self.input_buffer.pop(0)
-            self.buffer_timer = 0
+        self.input_frame += 1
+        self.commands.feed(self.input_frame, mask, self.facing_right)
 
     def check_special_move(self):
-        # 簡易波動拳コマンド: 下(2) -> 前(8 or 4) + 攻撃ボタン
-        # 実際には: 直近の履歴に「下」があり、その後に「前」があるか確認
-        
-        now = pygame.time.get_ticks()
-        # 過去0.5秒以内の入力のみ有効
-        valid_buffer = [x for x in self.input_buffer if now - x[0] < 500]
-        
-        if len(valid_buffer) < 2:
-            return False
-            
-        has_down = False
-        has_forward = False
-        
-        target_forward = 8 if self.facing_right else 4 # 8=RIGHT, 4=LEFT
-        
-        for _, mask in valid_buffer:
-            if mask & 2: # DOWN
-                has_down = True
-            if has_down and (mask & target_forward): # DOWNの後にFORWARD
-                has_forward = True
-                
-        return has_forward
+        # 波動拳コマンド: 下 -> 前 (+ 攻撃ボタン)
+        return self.commands.ready("hadoken", self.input_frame)
 
     def update(self, opponent):
-        if not self.is_sliding:
+        self.prev_x = self.x
+        self.prev_y = self.y
+        move = FRAME_DATA[self.action]
+        if move.turn:
             if opponent.x > self.x:
                 self.facing_right = True
             else:
@@ -259,10 +383,7 @@ class Fighter:
         
         self.x += self.vel_x
         
-        if self.is_sliding:
-            self.vel_x *= 0.95
-        else:
-            self.vel_x *= 0.8
+        self.vel_x *= move.friction
             
         if abs(self.vel_x) < 0.1:
             self.vel_x = 0
@@ -271,11 +392,8 @@ class Fighter:
         
         if self.action_timer > 0:
             self.action_timer -= 1
-            if self.action_timer == 0:
-                self.is_punching = False
-                self.is_kicking = False
-                self.is_sliding = False
-                self.is_shooting = False
+            if self.action_timer == 0 and not move.held:
+                self.action = Action.IDLE
         
         if self.hit_cooldown > 0:
             self.hit_cooldown -= 1
@@ -286,31 +404,16 @@ class Fighter:
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
     
+    # 判定の Rect は使い回しなので、次に呼ぶまでの間だけ使うこと
     def get_attack_rect(self):
-        if self.is_punching:
-            if 5 < self.action_timer < 15:
-                if self.facing_right:
-                    return pygame.Rect(self.x + 20, self.y - 70, 50, 30)
-                else:
-                    return pygame.Rect(self.x - 70, self.y - 70, 50, 30)
-        elif self.is_kicking:
-            if 5 < self.action_timer < 25:
-                if self.facing_right:
-                    return pygame.Rect(self.x + 20, self.y - 50, 70, 40)
-                else:
-                    return pygame.Rect(self.x - 90, self.y - 50, 70, 40)
-        elif self.is_sliding:
-            if 10 < self.action_timer < 35:
-                if self.facing_right:
-                    return pygame.Rect(self.x + 10, self.y - 30, 80, 30)
-                else:
-                    return pygame.Rect(self.x - 90, self.y - 30, 80, 30)
-        return None
+        return self.hitboxes.attack_rect(FRAME_DATA[self.action], self.action_timer, self.x, self.y, self.facing_right)
     
     def get_hurt_rect(self):
-        if self.is_sliding:
-            return pygame.Rect(self.x - 25, self.y - 50, 50, 50)
-        return pygame.Rect(self.x - 25, self.y - 100, 50, 100)
+        return self.hitboxes.hurt_rect(FRAME_DATA[self.action], self.x, self.y)
+    
+    def attack_damage(self):
+        """今の技が当たったときのダメージ"""
+        return FRAME_DATA[self.action].damage * self.power_mult
     
     def take_damage(self, amount):
         if self.hit_cooldown == 0:
@@ -331,93 +434,208 @@ class Fighter:
             self.vel_x = knockback
             self.vel_y = -5
             
-            self.is_punching = False
-            self.is_kicking = False
-            self.is_sliding = False
-            self.is_shooting = False
+            if not FRAME_DATA[self.action].held:
+                self.action = Action.IDLE
 
-    def draw(self, screen):
-        if self.damage_flash > 0 and self.damage_flash % 4 < 2:
-            return
+    def snapshot(self):
+        """ロールバック用に今の状態を保存する"""
+        state = self.__dict__.copy()
+        state["commands"] = self.commands.copy()
+        return state
 
-        draw_x = int(self.x)
-        draw_y = int(self.y)
-        
+    def restore(self, state):
+        self.__dict__.update(state)
+        # 同じ保存状態から何度でも戻せるよう、中身の変わるものは複製して使う
+        self.commands = state["commands"].copy()
+
+    def pose_name(self):
+        """今の見た目（ポーズ名）。ポーズ画像キャッシュのキーに使う"""
         if self.is_sliding:
-            pygame.draw.ellipse(screen, self.body_color, (draw_x - 40, draw_y - 40, 80, 40))
-            head_x = draw_x + 30 if self.facing_right else draw_x - 30
-            pygame.draw.circle(screen, SKIN_COLOR, (head_x, draw_y - 30), 20)
-            leg_x = draw_x - 40 if self.facing_right else draw_x + 40
-            pygame.draw.line(screen, self.detail_color, (draw_x, draw_y - 20), (leg_x, draw_y - 10), 8)
+            return "slide"
+        if self.is_guarding:
+            arms = "guard"
+        elif self.is_shooting:
+            arms = "shoot"
+        elif self.is_punching:
+            arms = "punch"
+        else:
+            arms = "idle"
+        if self.is_kicking:
+            legs = "kick"
+        elif self.is_jumping:
+            legs = "jump"
+        else:
+            return arms
+        return legs if arms == "idle" else f"{legs}_{arms}"
+
+    def settle(self):
+        """update しなくなるとき（決着後など）に呼ぶ。補間で前の位置との間を行き来して揺れないようにする"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    def draw_pos(self, alpha=1.0):
+        """描く位置。alpha は前の位置(0)から今の位置(1)までのどこを描くか"""
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        return int(x), int(y)
+
+    def draw(self, screen, alpha=1.0, detail=True):
+        if self.damage_flash > 0 and self.damage_flash % 4 < 2:
             return
 
-        pygame.draw.ellipse(screen, self.body_color, (draw_x - 25, draw_y - 80, 50, 60))
-        pygame.draw.circle(screen, SKIN_COLOR, (draw_x, draw_y - 90), 20)
-        
+        x, y = self.draw_pos(alpha)
+        sprite = get_pose_sprite(self.body_color, self.detail_color, self.pose_name(), self.facing_right, detail)
+        screen.blit(sprite, (x - POSE_ORIGIN_X, y - POSE_ORIGIN_Y))
+
+
+# ポーズ画像キャッシュ
+# 体の色・ポーズ・向きの組み合わせごとに一度だけ描いて、あとは blit するだけにする
+POSE_ORIGIN_X = 60  # 画像内での足元の位置
+POSE_ORIGIN_Y = 116
+POSE_SIZE = (120, 136)
+POSE_CACHE_SIZE = 64  # 敵の色はレベルごとに変わるので上限を付けておく
+
+pose_cache = SurfaceCache(POSE_CACHE_SIZE)
+
+def get_pose_sprite(body_color, detail_color, pose, facing_right, detail=True):
+    key = (body_color, detail_color, pose, facing_right, detail)
+    return pose_cache.get(key, render_pose, body_color, detail_color, pose, facing_right, detail)
+
+def render_pose(body_color, detail_color, pose, facing_right, detail=True):
+    sprite = pygame.Surface(POSE_SIZE, pygame.SRCALPHA)
+    draw_figure(sprite, POSE_ORIGIN_X, POSE_ORIGIN_Y, body_color, detail_color, pose, facing_right, detail)
+    if pygame.display.get_surface():
+        sprite = sprite.convert_alpha()
+    return sprite
+
+def draw_figure(screen, draw_x, draw_y, body_color, detail_color, pose, facing_right, detail=True):
+    """キャラクターを (draw_x, draw_y) を足元として描く
+
+    pose: "slide", "portrait"（キャラ選択画面用の上半身）, または
+          腕("idle", "guard", "shoot", "punch") と 脚("jump", "kick") の組み合わせ
+    detail: False なら目と口を省く（重いときの低画質用）
+    """
+    if pose == "slide":
+        pygame.draw.ellipse(screen, body_color, (draw_x - 40, draw_y - 40, 80, 40))
+        head_x = draw_x + 30 if facing_right else draw_x - 30
+        pygame.draw.circle(screen, SKIN_COLOR, (head_x, draw_y - 30), 20)
+        leg_x = draw_x - 40 if facing_right else draw_x + 40
+        pygame.draw.line(screen, detail_color, (draw_x, draw_y - 20), (leg_x, draw_y - 10), 8)
+        return
+
+    pygame.draw.ellipse(screen, body_color, (draw_x - 25, draw_y - 80, 50, 60))
+    pygame.draw.circle(screen, SKIN_COLOR, (draw_x, draw_y - 90), 20)
+    if pose == "portrait":
+        return
+    
+    legs, _, arms = pose.rpartition("_")
+    if arms in ("jump", "kick"):
+        legs, arms = arms, "idle"
+    
+    if detail:
         eye_color = BLACK
-        if self.facing_right:
+        if facing_right:
             pygame.draw.circle(screen, eye_color, (draw_x + 8, draw_y - 95), 3)
             pygame.draw.line(screen, eye_color, (draw_x + 5, draw_y - 85), (draw_x + 15, draw_y - 85), 2)
         else:
             pygame.draw.circle(screen, eye_color, (draw_x - 8, draw_y - 95), 3)
             pygame.draw.line(screen, eye_color, (draw_x - 15, draw_y - 85), (draw_x - 5, draw_y - 85), 2)
 
-        arm_color = self.detail_color
-        shoulder_y = draw_y - 70
-        
-        if self.is_guarding:
-            # Guard pose
-            if self.facing_right:
-                pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x + 20, shoulder_y - 20), 8)
-                pygame.draw.line(screen, arm_color, (draw_x + 20, shoulder_y - 20), (draw_x + 20, shoulder_y + 10), 8)
-            else:
-                pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x - 20, shoulder_y - 20), 8)
-                pygame.draw.line(screen, arm_color, (draw_x - 20, shoulder_y - 20), (draw_x - 20, shoulder_y + 10), 8)
-        elif self.is_shooting:
-            # Shooting pose (Hadoken pose)
-            if self.facing_right:
-                pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x + 30, shoulder_y), 8)
-                pygame.draw.line(screen, arm_color, (draw_x + 30, shoulder_y), (draw_x + 40, shoulder_y), 8)
-            else:
-                pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x - 30, shoulder_y), 8)
-                pygame.draw.line(screen, arm_color, (draw_x - 30, shoulder_y), (draw_x - 40, shoulder_y), 8)
-        elif self.is_punching:
-            if self.facing_right:
-                pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x + 40, shoulder_y), 8)
-            else:
-                pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x - 40, shoulder_y), 8)
+    arm_color = detail_color
+    shoulder_y = draw_y - 70
+    
+    if arms == "guard":
+        # Guard pose
+        if facing_right:
+            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x + 20, shoulder_y - 20), 8)
+            pygame.draw.line(screen, arm_color, (draw_x + 20, shoulder_y - 20), (draw_x + 20, shoulder_y + 10), 8)
+        else:
+            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x - 20, shoulder_y - 20), 8)
+            pygame.draw.line(screen, arm_color, (draw_x - 20, shoulder_y - 20), (draw_x - 20, shoulder_y + 10), 8)
+    elif arms == "shoot":
+        # Shooting pose (Hadoken pose)
+        if facing_right:
+            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x + 30, shoulder_y), 8)
+            pygame.draw.line(screen, arm_color, (draw_x + 30, shoulder_y), (draw_x + 40, shoulder_y), 8)
         else:
-            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x, shoulder_y + 30), 8)
+            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x - 30, shoulder_y), 8)
+            pygame.draw.line(screen, arm_color, (draw_x - 30, shoulder_y), (draw_x - 40, shoulder_y), 8)
+    elif arms == "punch":
+        if facing_right:
+            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x + 40, shoulder_y), 8)
+        else:
+            pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x - 40, shoulder_y), 8)
+    else:
+        pygame.draw.line(screen, arm_color, (draw_x, shoulder_y), (draw_x, shoulder_y + 30), 8)
 
-        leg_color = self.detail_color
-        hip_y = draw_y - 20
-        
-        if self.is_kicking:
-            if self.facing_right:
-                pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x + 50, hip_y - 10), 8)
-                pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x - 10, hip_y + 30), 8)
-            else:
-                pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x - 50, hip_y - 10), 8)
-                pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x + 10, hip_y + 30), 8)
+    leg_color = detail_color
+    hip_y = draw_y - 20
+    
+    if legs == "kick":
+        if facing_right:
+            pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x + 50, hip_y - 10), 8)
+            pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x - 10, hip_y + 30), 8)
         else:
-            if self.is_jumping:
-                pygame.draw.line(screen, leg_color, (draw_x - 10, hip_y), (draw_x - 15, hip_y + 20), 8)
-                pygame.draw.line(screen, leg_color, (draw_x + 10, hip_y), (draw_x + 15, hip_y + 20), 8)
-            else:
-                pygame.draw.line(screen, leg_color, (draw_x - 10, hip_y), (draw_x - 10, hip_y + 30), 8)
-                pygame.draw.line(screen, leg_color, (draw_x + 10, hip_y), (draw_x + 10, hip_y + 30), 8)
+            pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x - 50, hip_y - 10), 8)
+            pygame.draw.line(screen, leg_color, (draw_x, hip_y), (draw_x + 10, hip_y + 30), 8)
+    else:
+        if legs == "jump":
+            pygame.draw.line(screen, leg_color, (draw_x - 10, hip_y), (draw_x - 15, hip_y + 20), 8)
+            pygame.draw.line(screen, leg_color, (draw_x + 10, hip_y), (draw_x + 15, hip_y + 20), 8)
+        else:
+            pygame.draw.line(screen, leg_color, (draw_x - 10, hip_y), (draw_x - 10, hip_y + 30), 8)
+            pygame.draw.line(screen, leg_color, (draw_x + 10, hip_y), (draw_x + 10, hip_y + 30), 8)
+
+
+# 敵AIのパラメータ。tools/tune_ai.py が作った ai_params.json があれば、そちらの値で上書きする
+AI_PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_params.json")
+REACT_RANGE = 150  # この距離より近くで相手が技を出したら、気づいてガードすることがある
+
+def default_ai_params(level):
+    """レベルから式で決める、調整前のパラメータ"""
+    return {
+        "attack_chance": 0.3 + (level * 0.1),         # 近距離で攻撃する確率
+        "jump_chance": 0.3 if level >= 3 else 0,      # 近距離でジャンプする確率
+        "guard_chance": 0.3 if level >= 2 else 0,     # 近距離でガードする確率
+        "shoot_chance_mid": 0.1 if level >= 3 else 0, # 中距離で飛び道具を撃つ確率
+        "shoot_chance_far": 0.2 if level >= 3 else 0, # 遠距離で飛び道具を撃つ確率
+        "slide_chance": 0.3 if level >= 4 else 0,     # 中距離でスライディングする確率
+        "attack_slide": level >= 2,                   # 攻撃にスライディングを混ぜるか
+        "attack_cooldown_frames": max(20, 80 - level * 10),  # 攻撃したあと次に攻撃するまでのフレーム数
+        "reaction": max(5, 30 - level * 5),           # 相手の技に気づくまでのフレーム数
+        "block_chance": 0,                            # 気づいたときにガードする確率（調整ツールが上げる）
+    }
+
+def load_ai_params(path=AI_PARAMS_FILE):
+    """ステージ(1〜5) → パラメータ の表"""
+    table = {level: default_ai_params(level) for level in range(1, 6)}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        for level, params in data["stages"].items():
+            table[int(level)].update(params)
+    return table
+
+AI_PARAMS = load_ai_params()
+
+def ai_params(level):
+    return AI_PARAMS.get(level) or default_ai_params(level)
 
 
 class EnemyAI:
-    def __init__(self, fighter, level, game_ref):
+    def __init__(self, fighter, level, game_ref, params=None):
+        # params: 行動の確率など（省略時は AI_PARAMS のそのレベルの値）
         self.fighter = fighter
         self.level = level
         self.game_ref = game_ref
+        self.rng = game_ref.rng  # 乱数はGameから受け取る（シード固定で再現できるように）
         self.state = "wait"
         self.timer = 0
         self.attack_cooldown = 0
         self.aggression = max(10, 60 - level * 10) 
-        self.reaction = max(5, 30 - level * 5)
+        self.threat_frames = 0  # 相手が技を出してから何フレームたったか
+        self.params = params or ai_params(level)
+        self.__dict__.update(self.params)  # attack_chance などを属性にする
         
     def update(self, player):
         if self.attack_cooldown > 0:
@@ -426,43 +644,55 @@ class EnemyAI:
             self.timer -= 1
         
         dist_x = abs(player.x - self.fighter.x)
+        self.react(player, dist_x)
         
         if self.timer == 0:
             self._decide_action(dist_x, player)
             
         self._execute_action(player)
         
-    def _decide_action(self, dist_x, player):
-        attack_chance = 0.3 + (self.level * 0.1)
+    def react(self, player, dist_x):
+        """近くで相手が技を出したら、reaction フレーム後に気づいて（確率で）ガードする"""
+        if FRAME_DATA[player.action].hitbox and dist_x < REACT_RANGE:
+            self.threat_frames += 1
+            if self.threat_frames == self.reaction and self.block_chance and self.rng.random() < self.block_chance:
+                self.state = "guard"
+                self.timer = 20
+        else:
+            self.threat_frames = 0
+        
+    def close(self):
+        pass
         
+    def _decide_action(self, dist_x, player):
         if dist_x < 100:
-            if self.attack_cooldown == 0 and random.random() < attack_chance:
+            if self.attack_cooldown == 0 and self.rng.random() < self.attack_chance:
                 self.state = "attack"
                 self.timer = 30
             else:
-                if self.level >= 3 and random.random() < 0.3:
+                if self.jump_chance and self.rng.random() < self.jump_chance:
                     self.state = "jump"
                     self.timer = 20
-                elif self.level >= 2 and random.random() < 0.3:
+                elif self.guard_chance and self.rng.random() < self.guard_chance:
                     self.state = "guard"
                     self.timer = 30
                 else:
-                    self.state = "retreat" if random.random() < 0.5 else "wait"
+                    self.state = "retreat" if self.rng.random() < 0.5 else "wait"
                     self.timer = 20
                     
         elif dist_x < 400:
             # 遠距離でたまに飛び道具
-            if self.level >= 3 and self.attack_cooldown == 0 and random.random() < 0.1:
+            if self.shoot_chance_mid and self.attack_cooldown == 0 and self.rng.random() < self.shoot_chance_mid:
                 self.state = "shoot"
                 self.timer = 40
-            elif self.level >= 4 and random.random() < 0.3:
+            elif self.slide_chance and self.rng.random() < self.slide_chance:
                 self.state = "slide"
                 self.timer = 40
             else:
                 self.state = "chase"
                 self.timer = 30
         else:
-            if self.level >= 3 and self.attack_cooldown == 0 and random.random() < 0.2:
+            if self.shoot_chance_far and self.attack_cooldown == 0 and self.rng.random() < self.shoot_chance_far:
                 self.state = "shoot"
                 self.timer = 40
             else:
@@ -503,26 +733,153 @@ class EnemyAI:
             
         elif self.state == "attack":
             if not self.fighter.is_punching and not self.fighter.is_kicking:
-                roll = random.random()
+                roll = self.rng.random()
                 if roll < 0.4:
                     self.fighter.punch()
                 elif roll < 0.7:
                     self.fighter.kick()
-                elif self.level >= 2:
+                elif self.attack_slide:
                     self.fighter.slide()
                 else:
                     self.fighter.kick()
                     
-                self.attack_cooldown = max(20, 80 - self.level * 10)
+                self.attack_cooldown = self.attack_cooldown_frames
                 self.state = "wait"
                 
+        elif self.state in ("punch", "kick"):
+            # 技を指定して出す（SearchAI 用）
+            getattr(self.fighter, self.state)()
+            self.attack_cooldown = self.attack_cooldown_frames
+            self.state = "wait"
+                
         elif self.state == "wait":
             self.fighter.move(0)
 
 
+class SearchAI(EnemyAI):
+    """先読みで行動を選ぶ敵AI（search_ai.py）。時間が足りないときは EnemyAI と同じ決め方をする"""
+    
+    def __init__(self, fighter, level, game_ref, params=None):
+        super().__init__(fighter, level, game_ref, params)
+        self.planner = RolloutPlanner(Projectile, self.rng.getrandbits(32))
+        
+    def _decide_action(self, dist_x, player):
+        plan = self.planner.decide(self.fighter, player, self.game_ref.projectiles, self.game_ref.deterministic())
+        if plan is None:
+            super()._decide_action(dist_x, player)
+        else:
+            self.state, self.timer = plan
+
+
+# 敵AIの種類（python main.py --ai search で切り替え）
+AI_TIERS = {"heuristic": EnemyAI, "search": SearchAI}
+
+
+class ThinkContext:
+    """別スレッドで考える AI 用の game_ref の代わり（本物の Game には触らせない）"""
+    
+    def __init__(self, seed, deterministic):
+        self.rng = random.Random(seed)
+        self.projectiles = ProjectilePool(Projectile, 8)
+        self._deterministic = deterministic
+        
+    def deterministic(self):
+        return self._deterministic
+
+
+class AsyncEnemyAI(EnemyAI):
+    """思考を別スレッドに任せる敵AI（async_ai.py）
+    
+    行動を決めるタイミングで両者のコピーを渡し、latency フレーム後に届いた判断から使う。
+    判断が届くまでは今の行動を続ける。考える中身は tier（EnemyAI / SearchAI）と同じ。
+    """
+    
+    def __init__(self, fighter, level, game_ref, tier=EnemyAI, latency=6, params=None):
+        super().__init__(fighter, level, game_ref, params)
+        self.latency = latency
+        self.frame = 0
+        self.waiting = False
+        self.tier = tier
+        self.seed = self.rng.getrandbits(32)
+        self.worker = None  # 最初に考えるときに作る（リプレイ再生かどうかがそこで決まっているので）
+        
+    def start_worker(self):
+        deterministic = self.game_ref.deterministic()
+        self.brain = self.tier(None, self.level, ThinkContext(self.seed, deterministic), self.params)
+        threaded = not deterministic and sys.platform != "emscripten"
+        self.worker = DecisionWorker(self.think, self.latency, threaded)
+        
+    def update(self, player):
+        self.frame += 1
+        if self.attack_cooldown > 0:
+            self.attack_cooldown -= 1
+        if self.timer > 0:
+            self.timer -= 1
+        self.react(player, abs(player.x - self.fighter.x))
+        
+        if self.worker is None:
+            self.start_worker()
+        decision = self.worker.poll(self.frame)
+        if decision:
+            self.state, self.timer = decision
+            self.waiting = False
+        
+        if self.timer == 0 and not self.waiting:
+            self.worker.post(self.frame, self.snapshot(player))
+            self.waiting = True
+            
+        self._execute_action(player)
+        
+    def snapshot(self, player):
+        """考える側に渡すコピー。思考中にこちらが動いても影響しないようにする"""
+        me = copy.copy(self.fighter)
+        opponent = copy.copy(player)
+        for f in (me, opponent):
+            f.hitboxes = Hitboxes()  # 判定の Rect は使い回しなので別のものにする
+        owners = {self.fighter: me, player: opponent}
+        shots = []
+        for state in self.game_ref.projectiles.snapshot():
+            state["owner"] = owners.get(state["owner"], state["owner"])
+            shots.append(state)
+        return me, opponent, self.attack_cooldown, shots
+        
+    def think(self, snapshot):
+        """（別スレッドで呼ばれる）コピーを使って次の行動を決める"""
+        me, opponent, attack_cooldown, shots = snapshot
+        brain = self.brain
+        brain.fighter = me
+        brain.attack_cooldown = attack_cooldown
+        brain.game_ref.projectiles.restore(shots)
+        brain._decide_action(abs(opponent.x - me.x), opponent)
+        return brain.state, brain.timer
+        
+    def close(self):
+        if self.worker:
+            self.worker.close()
+
+
+def paint_stage_background(surface):
+    """空と地面（動かない部分）"""
+    surface.fill(SKY_BLUE)
+    pygame.draw.rect(surface, GRASS_GREEN, (0, GROUND_Y, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_Y))
+    pygame.draw.line(surface, (50, 100, 50), (0, GROUND_Y), (SCREEN_WIDTH, GROUND_Y), 3)
+
+
 class Game:
-    def __init__(self):
-        self.state = "SELECT" # SELECT, GAME, GAMEOVER
+    def __init__(self, seed=None, realtime=True, versus=False, ai="heuristic", ai_latency=None):
+        # seed: 乱数シード（Noneなら毎回ランダム）
+        # realtime: Falseならステージ間の待ち時間を入れずに最速で進める（ヘッドレス実行用）
+        # versus: Trueなら2Pも人が操作する（オンライン対戦用）。enemy が 2P になる
+        # ai: 敵AIの種類（AI_TIERS のキー）
+        # ai_latency: 指定すると敵AIの思考を別スレッドで行い、そのフレーム数だけ遅れて反応する
+        self.rng = random.Random(seed)
+        self.realtime = realtime
+        self.versus = versus
+        self.ai = ai
+        self.ai_latency = ai_latency
+        self.enemy_ai = None
+        self.p2_char = "BALANCE"
+        self.state = "SELECT" # SELECT, GAME, STAGE_CLEAR
         self.selected_char = "BALANCE"
         self.char_list = list(CHAR_TYPES.keys())
         self.char_index = 0
@@ -530,21 +887,68 @@ class Game:
         self.current_level = 1
         self.max_levels = 5
         self.game_cleared = False
-        self.projectiles = []
-        
-    def start_game(self):
+        self.projectiles = ProjectilePool(Projectile)
+        self.transition_timer = 0
+        self.background = BackgroundLayer(paint_stage_background)
+        self.dirty_view = None
+        self.hud_rects = {}  # draw_ui で HUD を描いた範囲（ダーティ矩形描画用）
+        self.overlays = OverlayManager((SCREEN_WIDTH, SCREEN_HEIGHT))
+        
+        # ステージ遷移中のフレーム時間の記録（ループが止まっていないかの確認用）
+        self.transition_frames = 0
+        self.transition_spikes = 0
+        self.transition_worst_ms = 0
+        
+        # リプレイ
+        self.record_dir = None  # ここにフォルダを入れておくと、試合ごとに入力を記録する
+        self.recorder = None
+        self.replay = None  # 再生中の ReplayReader
+        
+        self.profiler = NullProfiler()  # main() で FrameProfiler に差し替える
+        self.quality = HIGH  # 描画の細かさ（AdaptiveQuality が下げる。HIGH 未満なら顔の線や弾の模様を省く）
+        self.alpha = 1.0  # 描画の補間（固定タイムステップで、前の update から次の update までのどこを描くか）
+        
+    def start_game(self, level=1, seed=None):
+        # seed: 指定すると乱数をその値から始める（リプレイの記録・再生用）
+        if self.record_dir is not None and seed is None:
+            seed = random.randrange(1 << 32)
+        if seed is not None:
+            self.rng.seed(seed)
         self.state = "GAME"
-        self.current_level = 1
+        self.current_level = level
         self.game_cleared = False
         self.reset_round()
+        if self.record_dir is not None:
+            self.stop_recording()
+            self.recorder = ReplayWriter.create(self.record_dir, seed, self.selected_char, level, self.ai,
+                                                self.ai_latency)
+
+    def deterministic(self):
+        """実行時間で結果が変わる処理をしてはいけないか（ヘッドレス実行・リプレイの記録/再生中）"""
+        return not self.realtime or self.record_dir is not None or self.replay is not None
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            print(f"Replay saved: {self.recorder.path} ({self.recorder.frames} frames)")
+            self.recorder = None
         
     def reset_round(self):
         self.player = Fighter(200, 1, self.selected_char)
         
-        self.enemy = Fighter(1000, 2, "BALANCE", self.current_level)
-        self.enemy_ai = EnemyAI(self.enemy, self.current_level, self)
+        if self.enemy_ai:
+            self.enemy_ai.close()
+        if self.versus:
+            self.enemy = Fighter(1000, 2, self.p2_char, human=True)
+            self.enemy_ai = None
+        else:
+            self.enemy = Fighter(1000, 2, "BALANCE", self.current_level)
+            if self.ai_latency is None:
+                self.enemy_ai = AI_TIERS[self.ai](self.enemy, self.current_level, self)
+            else:
+                self.enemy_ai = AsyncEnemyAI(self.enemy, self.current_level, self, AI_TIERS[self.ai], self.ai_latency)
         
-        self.projectiles = []
+        self.projectiles.clear()
         self.round_time = 60
         self.frame_count = 0
         self.game_over = False
@@ -552,10 +956,21 @@ class Game:
         self.start_delay = 60
         
     def handle_input(self):
+        if self.replay:
+            # 再生中はキーボードの代わりにファイルの入力を使う（ステージクリア中の分も1バイトずつ入っている）
+            bits = self.replay.next_bits()
+            if self.state == "GAME":
+                self.handle_game_input(unpack_inputs(bits))
+            return
+        
         if self.state == "SELECT":
             self.handle_select_input()
-        elif self.state == "GAME":
-            self.handle_game_input()
+        elif self.state in ("GAME", "STAGE_CLEAR"):
+            inputs = self.read_keyboard()
+            if self.recorder:
+                self.recorder.record(pack_inputs(inputs))
+            if self.state == "GAME":
+                self.handle_game_input(inputs)
 
     def handle_select_input(self):
         # キーボードのイベント処理はメインループで行われているが、
@@ -579,51 +994,80 @@ class Game:
                 elif event.key == pygame.K_z or event.key == pygame.K_RETURN:
                     self.start_game()
 
-    def handle_game_input(self):
+    def read_keyboard(self):
+        """今のキー状態を入力辞書（INPUT_KEYS）にする"""
         keys = pygame.key.get_pressed()
-        
-        # 入力状態の更新（コマンド判定用）
-        inputs = {
+        return {
             "UP": keys[pygame.K_w] or keys[pygame.K_UP],
             "DOWN": keys[pygame.K_s] or keys[pygame.K_DOWN],
             "LEFT": keys[pygame.K_a] or keys[pygame.K_LEFT],
-            "RIGHT": keys[pygame.K_d] or keys[pygame.K_RIGHT]
+            "RIGHT": keys[pygame.K_d] or keys[pygame.K_RIGHT],
+            "Z": keys[pygame.K_z],
+            "X": keys[pygame.K_x],
+            "SPACE": keys[pygame.K_SPACE],
+            "R": keys[pygame.K_r],
         }
-        self.player.update_input(inputs)
+
+    def handle_game_input(self, inputs=None):
+        # inputs を渡すとキーボードの代わりにそれを使う（ヘッドレス実行・スクリプト入力用）
+        if inputs is None:
+            inputs = self.read_keyboard()
+        
+        self.apply_inputs(self.player, inputs)
+            
+        if inputs["R"] and (self.game_over or self.game_cleared):
+            self.state = "SELECT" # リスタート時はキャラ選択へ
+            self.stop_recording()
+
+    def handle_versus_input(self, p1_inputs, p2_inputs):
+        """対人戦用: 1P と 2P の入力をそれぞれ反映する"""
+        self.apply_inputs(self.player, p1_inputs)
+        self.apply_inputs(self.enemy, p2_inputs)
+
+    def apply_inputs(self, fighter, inputs):
+        # 入力状態の更新（コマンド判定用）
+        fighter.update_input(inputs)
         
         move_dir = 0
         if inputs["LEFT"]:
             move_dir = -1
         elif inputs["RIGHT"]:
             move_dir = 1
-        self.player.move(move_dir)
+        fighter.move(move_dir)
         
         if inputs["UP"]:
-            self.player.jump()
+            fighter.jump()
             
         # 攻撃・アクション
-        if keys[pygame.K_z]:
+        if inputs["Z"]:
             # コマンド判定
-            if self.player.check_special_move():
-                self.player.shoot(self)
+            if fighter.check_special_move():
+                fighter.shoot(self)
             else:
-                self.player.punch()
+                fighter.punch()
                 
-        if keys[pygame.K_x]:
-            self.player.kick()
-        if keys[pygame.K_SPACE]:
-            self.player.slide()
+        if inputs["X"]:
+            fighter.kick()
+        if inputs["SPACE"]:
+            fighter.slide()
             
         # Guard input
         if inputs["DOWN"]:
-            self.player.guard(True)
+            fighter.guard(True)
         else:
-            self.player.guard(False)
-            
-        if keys[pygame.K_r] and (self.game_over or self.game_cleared):
-            self.state = "SELECT" # リスタート時はキャラ選択へ
+            fighter.guard(False)
 
     def update(self):
+        if self.state == "STAGE_CLEAR":
+            # 待ち時間の間も描画・イベント処理は続ける（pygame.time.delay で止めない）
+            if self.transition_timer > 0:
+                self.transition_timer -= 1
+            if self.transition_timer == 0:
+                self.current_level += 1
+                self.reset_round()
+                self.state = "GAME"
+            return
+
         if self.state != "GAME":
             return
 
@@ -635,16 +1079,16 @@ class Game:
             return
         
         self.player.update(self.enemy)
-        self.enemy_ai.update(self.player)
+        if self.enemy_ai:
+            self.enemy_ai.update(self.player)
         self.enemy.update(self.player)
         
         # 飛び道具の更新
-        for p in self.projectiles[:]:
-            p.update()
-            if not p.active:
-                self.projectiles.remove(p)
+        self.projectiles.update()
         
+        self.profiler.mark("update")
         self.check_collision()
+        self.profiler.mark("collision")
         
         self.frame_count += 1
         if self.frame_count >= FPS:
@@ -660,41 +1104,44 @@ class Game:
         # 通常攻撃の判定
         p_attack = self.player.get_attack_rect()
         if p_attack and p_attack.colliderect(self.enemy.get_hurt_rect()):
-            damage = 10 * self.player.power_mult
-            if self.player.is_kicking: damage = 15 * self.player.power_mult
-            if self.player.is_sliding: damage = 12 * self.player.power_mult
-            self.enemy.take_damage(damage)
+            self.enemy.take_damage(self.player.attack_damage())
                 
         e_attack = self.enemy.get_attack_rect()
         if e_attack and e_attack.colliderect(self.player.get_hurt_rect()):
-            damage = 10 + (self.current_level * 2)
-            damage *= self.enemy.power_mult
+            if self.versus:
+                # 対人戦では 2P も 1P と同じダメージ計算
+                damage = self.enemy.attack_damage()
+            else:
+                damage = 10 + (self.current_level * 2)
+                damage *= self.enemy.power_mult
             self.player.take_damage(damage)
             
-        # 飛び道具の判定
-        for p in self.projectiles:
-            if not p.active: continue
+        # 飛び道具の判定（x 座標で並べて、近くにあるものだけ調べる）
+        self.projectiles.sort()
+        for a, b in self.projectiles.clashes():
+            # 相手の飛び道具とぶつかったら相殺
+            a.active = False
+            b.active = False
             
-            target = None
-            if p.owner == self.player:
-                target = self.enemy
-            else:
-                target = self.player
-                
-            if p.get_rect().colliderect(target.get_hurt_rect()):
+        for target in (self.enemy, self.player):
+            for p in self.projectiles.hits(target.get_hurt_rect()):
+                if p.owner is target or not p.active: continue
                 damage = 15 * p.owner.power_mult
                 target.take_damage(damage)
                 p.active = False # 当たったら消える
                 
     def end_round(self):
         self.game_over = True
+        self.player.settle()
+        self.enemy.settle()
         
         if self.player.health > self.enemy.health:
             self.winner = self.player
-            if self.current_level < self.max_levels:
-                pygame.time.delay(2000) 
-                self.current_level += 1
-                self.reset_round()
+            if self.versus:
+                pass # 対人戦は1ラウンドで終わり
+            elif self.current_level < self.max_levels:
+                self.state = "STAGE_CLEAR"
+                self.transition_timer = STAGE_CLEAR_FRAMES if self.realtime else 0
             else:
                 self.game_cleared = True
         elif self.enemy.health > self.player.health:
@@ -702,17 +1149,90 @@ class Game:
         else:
             self.winner = None
             
+    def save_state(self):
+        """ロールバック用に、対戦の状態をまるごと保存する
+
+        Fighter は作り直さずに中身だけ戻すので、飛び道具の owner や winner の参照もそのまま使える。
+        """
+        return {
+            "state": self.state,
+            "current_level": self.current_level,
+            "game_cleared": self.game_cleared,
+            "transition_timer": self.transition_timer,
+            "round_time": self.round_time,
+            "frame_count": self.frame_count,
+            "game_over": self.game_over,
+            "winner": self.winner,
+            "start_delay": self.start_delay,
+            "rng": self.rng.getstate(),
+            "player": (self.player, self.player.snapshot()),
+            "enemy": (self.enemy, self.enemy.snapshot()),
+            "enemy_ai": (self.enemy_ai, self.enemy_ai.__dict__.copy() if self.enemy_ai else None),
+            "projectiles": self.projectiles.snapshot(),
+        }
+
+    def load_state(self, saved):
+        for key in ("state", "current_level", "game_cleared", "transition_timer", "round_time",
+                    "frame_count", "game_over", "winner", "start_delay"):
+            setattr(self, key, saved[key])
+        self.rng.setstate(saved["rng"])
+
+        self.player, player_state = saved["player"]
+        self.player.restore(player_state)
+        self.enemy, enemy_state = saved["enemy"]
+        self.enemy.restore(enemy_state)
+        self.enemy_ai, ai_state = saved["enemy_ai"]
+        if self.enemy_ai:
+            self.enemy_ai.__dict__.update(ai_state)
+
+        self.projectiles.restore(saved["projectiles"])
+
     def draw(self):
-        screen.fill(SKY_BLUE)
-        
         if self.state == "SELECT":
             self.draw_select_screen()
         elif self.state == "GAME":
             self.draw_game_screen()
+        elif self.state == "STAGE_CLEAR":
+            self.draw_game_screen()
+            self.draw_stage_clear()
+
+    def mark_dirty_rects(self, renderer):
+        """ダーティ矩形描画用に、このフレームで変わりうる領域を登録する"""
+        # 画面の切り替え（開始表示・決着・ステージクリアなど）は全画面を送る
+        if self.state == "SELECT":
+            renderer.invalidate()
+            self.dirty_view = None
+            return
+        view = (self.state, self.start_delay > 0, self.game_over, self.game_cleared, self.current_level)
+        if view != self.dirty_view:
+            renderer.invalidate()
+        self.dirty_view = view
+
+        for key, f in (("player", self.player), ("enemy", self.enemy)):
+            x, y = f.draw_pos(self.alpha)
+            renderer.mark(key, (x - POSE_ORIGIN_X, y - POSE_ORIGIN_Y) + POSE_SIZE)
+        for p in self.projectiles:
+            renderer.mark(p, p.get_rect().inflate(4, 4))
+
+        # HUD は draw_ui で実際に描いた範囲を送る（文字の大きさはフォントによって変わる）
+        hud = self.hud_rects
+        renderer.mark("player_bar", hud["player_bar"], self.player.health)
+        renderer.mark("enemy_bar", hud["enemy_bar"], self.enemy.health)
+        renderer.mark("timer", hud["timer"], self.round_time)
+        if self.replay:
+            renderer.mark("replay", hud["guide"], self.replay.frame // FPS)
+
+    def record_frame_time(self, dt_ms):
+        if self.state != "STAGE_CLEAR":
+            return
+        self.transition_frames += 1
+        self.transition_worst_ms = max(self.transition_worst_ms, dt_ms)
+        if dt_ms > FRAME_SPIKE_MS:
+            self.transition_spikes += 1
             
     def draw_select_screen(self):
         screen.fill(BLACK)
-        title = font_large.render("CHARACTER SELECT", True, WHITE)
+        title = text_cache.render(font_large, "CHARACTER SELECT", WHITE)
         screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
         
         # キャラクター表示
@@ -726,38 +1246,38 @@ class Game:
             # 簡易的なキャラの絵
             x = 150 + i*300 + 100
             y = 400
-            pygame.draw.ellipse(screen, color, (x - 25, y - 80, 50, 60))
-            pygame.draw.circle(screen, SKIN_COLOR, (x, y - 90), 20)
+            sprite = get_pose_sprite(color, data["detail"], "portrait", True)
+            screen.blit(sprite, (x - POSE_ORIGIN_X, y - POSE_ORIGIN_Y))
             
-            name_text = font_medium.render(char_name, True, WHITE)
+            name_text = text_cache.render(font_medium, char_name, WHITE)
             screen.blit(name_text, (x - name_text.get_width()//2, 450))
             
             # パラメータ表示
             stats = f"HP:{data['hp']} SPD:{data['speed']} PWR:{data['power']}"
-            stat_text = font_small.render(stats, True, GRAY)
+            stat_text = text_cache.render(font_small, stats, GRAY)
             screen.blit(stat_text, (x - stat_text.get_width()//2, 490))
             
         desc = CHAR_TYPES[self.selected_char]["desc"]
-        desc_text = font_medium.render(desc, True, YELLOW)
+        desc_text = text_cache.render(font_medium, desc, YELLOW)
         screen.blit(desc_text, (SCREEN_WIDTH//2 - desc_text.get_width()//2, 550))
 
     def draw_game_screen(self):
-        pygame.draw.rect(screen, GRASS_GREEN, (0, GROUND_Y, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_Y))
-        pygame.draw.line(screen, (50, 100, 50), (0, GROUND_Y), (SCREEN_WIDTH, GROUND_Y), 3)
+        self.background.draw(screen)
         
-        self.player.draw(screen)
-        self.enemy.draw(screen)
+        detail = self.quality == HIGH
+        self.player.draw(screen, self.alpha, detail)
+        self.enemy.draw(screen, self.alpha, detail)
         
         for p in self.projectiles:
-            p.draw(screen)
+            p.draw(screen, detail)
             
         self.draw_ui()
         
         if self.start_delay > 0:
-            level_text = font_large.render(f"STAGE {self.current_level}", True, BLACK)
+            level_text = text_cache.render(font_large, f"STAGE {self.current_level}", BLACK)
             screen.blit(level_text, (SCREEN_WIDTH//2 - level_text.get_width()//2, SCREEN_HEIGHT//2 - 50))
             if self.current_level == 5:
-                boss_text = font_medium.render("- FINAL BOSS -", True, RED)
+                boss_text = text_cache.render(font_medium, "- FINAL BOSS -", RED)
                 screen.blit(boss_text, (SCREEN_WIDTH//2 - boss_text.get_width()//2, SCREEN_HEIGHT//2 + 20))
         
         if self.game_cleared:
@@ -772,81 +1292,146 @@ class Game:
         pygame.draw.rect(screen, GRAY, (50, 30, bar_w, bar_h))
         p_ratio = self.player.health / self.player.max_health
         pygame.draw.rect(screen, BLUE, (50, 30, int(bar_w * p_ratio), bar_h))
-        pygame.draw.rect(screen, WHITE, (50, 30, bar_w, bar_h), 3)
-        screen.blit(font_small.render(self.player.name, True, WHITE), (50, 65))
+        self.hud_rects["player_bar"] = pygame.draw.rect(screen, WHITE, (50, 30, bar_w, bar_h), 3)
+        screen.blit(text_cache.render(font_small, self.player.name, WHITE), (50, 65))
         
         enemy_x = SCREEN_WIDTH - 50 - bar_w
         pygame.draw.rect(screen, GRAY, (enemy_x, 30, bar_w, bar_h))
         e_ratio = self.enemy.health / self.enemy.max_health
         e_w = int(bar_w * e_ratio)
         pygame.draw.rect(screen, RED, (enemy_x + (bar_w - e_w), 30, e_w, bar_h))
-        pygame.draw.rect(screen, WHITE, (enemy_x, 30, bar_w, bar_h), 3)
-        screen.blit(font_small.render(self.enemy.name, True, WHITE), (enemy_x, 65))
+        self.hud_rects["enemy_bar"] = pygame.draw.rect(screen, WHITE, (enemy_x, 30, bar_w, bar_h), 3)
+        screen.blit(text_cache.render(font_small, self.enemy.name, WHITE), (enemy_x, 65))
         
-        time_text = font_large.render(str(self.round_time), True, YELLOW)
-        screen.blit(time_text, (SCREEN_WIDTH//2 - time_text.get_width()//2, 20))
+        time_text = text_cache.render(font_large, str(self.round_time), YELLOW)
+        self.hud_rects["timer"] = screen.blit(time_text, (SCREEN_WIDTH//2 - time_text.get_width()//2, 20))
         
-        stage_text = font_medium.render(f"STAGE {self.current_level}/5", True, BLACK)
+        stage_text = text_cache.render(font_medium, f"STAGE {self.current_level}/5", BLACK)
         screen.blit(stage_text, (SCREEN_WIDTH//2 - stage_text.get_width()//2, 80))
         
-        guide = font_small.render("Move:Arrow  Attack:Z/X  Guard:Down  Hadoken:Down->Fwd+Z", True, WHITE)
-        screen.blit(guide, (20, SCREEN_HEIGHT - 40))
+        if self.replay:
+            seconds = f"{self.replay.frame // FPS}s / {len(self.replay) // FPS}s"
+            guide = text_cache.render(font_small, f"REPLAY {seconds}  Seek:Left/Right", YELLOW)
+        else:
+            guide = text_cache.render(font_small, ui_text("guide"), WHITE)
+        self.hud_rects["guide"] = screen.blit(guide, (20, SCREEN_HEIGHT - 40))
 
-    def draw_game_over(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        screen.blit(overlay, (0,0))
-        
-        text = font_large.render("GAME OVER", True, RED)
+    def draw_stage_clear(self):
+        text = text_cache.render(font_large, f"STAGE {self.current_level} CLEAR!", YELLOW)
+        text_shadow = text_cache.render(font_large, f"STAGE {self.current_level} CLEAR!", BLACK)
+        screen.blit(text_shadow, (SCREEN_WIDTH//2 - text.get_width()//2 + 4, SCREEN_HEIGHT//2 - 50 + 4))
         screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - 50))
+
+    def draw_game_over(self):
+        key = ("game_over", self.current_level)
+        screen.blit(self.overlays.get(key, BLACK, 180, self.compose_game_over), (0, 0))
+
+    def compose_game_over(self, overlay):
+        text = text_cache.render(font_large, "GAME OVER", RED)
+        overlay.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - 50))
         
-        info = font_medium.render(f"Reached Stage: {self.current_level}", True, WHITE)
-        screen.blit(info, (SCREEN_WIDTH//2 - info.get_width()//2, SCREEN_HEIGHT//2 + 20))
+        info = text_cache.render(font_medium, ui_text("reached", level=self.current_level), WHITE)
+        overlay.blit(info, (SCREEN_WIDTH//2 - info.get_width()//2, SCREEN_HEIGHT//2 + 20))
         
-        retry = font_medium.render("Press R to Select Character", True, WHITE)
-        screen.blit(retry, (SCREEN_WIDTH//2 - retry.get_width()//2, SCREEN_HEIGHT//2 + 80))
+        retry = text_cache.render(font_medium, ui_text("retry"), WHITE)
+        overlay.blit(retry, (SCREEN_WIDTH//2 - retry.get_width()//2, SCREEN_HEIGHT//2 + 80))
 
     def draw_game_clear(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(WHITE)
-        screen.blit(overlay, (0,0))
-        
-        text = font_large.render("ALL STAGES CLEARED!", True, YELLOW)
-        text_shadow = font_large.render("ALL STAGES CLEARED!", True, BLACK)
-        screen.blit(text_shadow, (SCREEN_WIDTH//2 - text.get_width()//2 + 4, SCREEN_HEIGHT//2 - 50 + 4))
-        screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - 50))
+        screen.blit(self.overlays.get("game_clear", WHITE, 180, self.compose_game_clear), (0, 0))
+
+    def compose_game_clear(self, overlay):
+        text = text_cache.render(font_large, "ALL STAGES CLEARED!", YELLOW)
+        text_shadow = text_cache.render(font_large, "ALL STAGES CLEARED!", BLACK)
+        overlay.blit(text_shadow, (SCREEN_WIDTH//2 - text.get_width()//2 + 4, SCREEN_HEIGHT//2 - 50 + 4))
+        overlay.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - 50))
         
-        msg = font_medium.render("Congratulations! You won!", True, BLACK)
-        screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, SCREEN_HEIGHT//2 + 50))
+        msg = text_cache.render(font_medium, ui_text("congrats"), BLACK)
+        overlay.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, SCREEN_HEIGHT//2 + 50))
         
-        retry = font_medium.render("Press R to Select Character", True, BLACK)
-        screen.blit(retry, (SCREEN_WIDTH//2 - retry.get_width()//2, SCREEN_HEIGHT//2 + 100))
+        retry = text_cache.render(font_medium, ui_text("retry"), BLACK)
+        overlay.blit(retry, (SCREEN_WIDTH//2 - retry.get_width()//2, SCREEN_HEIGHT//2 + 100))
 
 
 
 async def main():
-    game = Game()
+    startup = StartupTimer(START_NS, STARTUP_REPORT, STARTUP_JSON)
+    startup.mark("import")
+    init_display()
+    startup.mark("init")
+    game = Game(ai=AI_TIER, ai_latency=AI_LATENCY)
+    if REPLAY_PATH:
+        start_playback(game, ReplayReader.load(REPLAY_PATH))
+    else:
+        game.record_dir = RECORD_DIR
+    dirty = DirtyRectRenderer((SCREEN_WIDTH, SCREEN_HEIGHT)) if USE_DIRTY_RECTS else None
+    profiler = FrameProfiler(PROFILE_PHASES, PROFILE, PROFILE_CSV)
+    game.profiler = profiler
+    timestep = FixedTimestep(FPS, MAX_STEPS)
+    adaptive = AdaptiveQuality(FPS, ADAPTIVE, verbose=ADAPTIVE)
     running = True
     while running:
+        profiler.begin_frame()
+        adaptive.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+                elif event.key == pygame.K_F2 and dirty:
+                    dirty.debug = not dirty.debug
+                elif event.key == pygame.K_F3:
+                    profiler.toggle()
+                elif game.replay and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    # 描画せずに計算だけで早送り・巻き戻し
+                    step = REPLAY_SEEK_FRAMES if event.key == pygame.K_RIGHT else -REPLAY_SEEK_FRAMES
+                    seek(game, game.replay, game.replay.frame + step)
+                    if dirty:
+                        dirty.invalidate()
             
             # イベントをGameクラスに渡す
             game.handle_events(event)
-        
-        game.handle_input()
-        game.update()
-        game.draw()
-        pygame.display.flip()
-        clock.tick(FPS)
+        startup.events_handled()
+        profiler.mark("events")
+        
+        # ゲームは 1/60 秒ずつ進める（入力の記録・再生も1回ずつ）。描画はその後に1回だけ
+        for _ in range(timestep.advance()):
+            game.handle_input()
+            profiler.mark("input")
+            game.update()  # "update" と "collision" は Game.update の中で記録する
+        game.alpha = timestep.alpha
+        game.quality = adaptive.quality
+        # 重いときは描画だけ飛ばす（ゲームは上で進んでいる）
+        if adaptive.should_render():
+            game.draw()
+            profiler.draw(screen, font_small)
+            profiler.mark("draw")
+            if dirty:
+                game.mark_dirty_rects(dirty)
+                if profiler.visible:
+                    dirty.mark("profiler", profiler.area)
+                dirty.present(screen)
+            else:
+                pygame.display.flip()
+            startup.presented()
+        profiler.mark("flip")
+        adaptive.presented()
+        frame_ms = clock.tick(RENDER_FPS)
+        adaptive.end_frame(frame_ms)
+        game.record_frame_time(frame_ms)
+        profiler.mark("tick")
+        profiler.end_frame()
         await asyncio.sleep(0)  # Essential for pygbag
 
+    game.stop_recording()
+    profiler.close()
+    if timestep.extra or timestep.dropped:
+        print(f"Fixed timestep: {timestep.stats()}")
+    if ADAPTIVE:
+        print(f"Adaptive quality: {adaptive.telemetry()}")
+    if game.transition_frames:
+        print(f"Stage transitions: {game.transition_frames} frames, "
+              f"{game.transition_spikes} spikes > {FRAME_SPIKE_MS}ms (worst {game.transition_worst_ms}ms)")
     pygame.quit()
     sys.exit()
 
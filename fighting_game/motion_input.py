@@ -0,0 +1,155 @@
+"""コマンド入力（必殺技の入力判定）
+
+方向入力はテンキー表記で書く（キャラが右向きのとき）:
+
+    7 8 9      7=左上  8=上  9=右上
+    4 5 6      4=後ろ  5=ニュートラル  6=前
+    1 2 3      1=左下  2=下  3=前下
+
+    "26"     下 → 前（波動拳の簡易版）
+    "236"    下 → 前下 → 前（波動拳）
+    "[4]6"   後ろ溜め → 前（溜め技。溜めるフレーム数は charge で指定）
+    "656"    前 → ニュートラル → 前（ダッシュなどの2回入力）
+
+前・後ろはキャラの向きに合わせて入れ替わる。
+"2" は下が入っていれば左右は問わない（"3" も "2" として扱う）ので、多少雑な入力でも出る。
+
+パターンは compile_command() で一度だけ状態機械に変換しておき、
+毎フレーム feed() で1入力ずつ進める。履歴を毎回見直さないので、
+技やキャラが増えても1フレームあたりの処理はパターンの長さ分だけで済む。
+"""
+
+# 入力マスク（Fighter.update_input と同じ）
+UP, DOWN, LEFT, RIGHT = 1, 2, 4, 8
+
+FORWARD = "F"
+BACK = "B"
+
+# テンキーの数字 → (縦, 横) の必要な入力
+_NUMPAD = {
+    "1": (DOWN, BACK), "2": (DOWN, None), "3": (DOWN, FORWARD),
+    "4": (None, BACK), "5": (0, 0), "6": (None, FORWARD),
+    "7": (UP, BACK), "8": (UP, None), "9": (UP, FORWARD),
+}
+
+
+class Step:
+    """パターン中の1つの入力"""
+
+    def __init__(self, vertical, horizontal, charge=0):
+        self.vertical = vertical      # UP / DOWN / None(問わない) / 0(入れない)
+        self.horizontal = horizontal  # FORWARD / BACK / None / 0
+        self.charge = charge          # 溜めが必要なフレーム数（0なら普通の入力）
+
+    def key(self):
+        return (self.vertical, self.horizontal, self.charge)
+
+    def matches(self, mask, facing_right):
+        vertical = mask & (UP | DOWN)
+        horizontal = mask & (LEFT | RIGHT)
+        if self.vertical == 0 and vertical:
+            return False
+        if self.vertical and not vertical & self.vertical:
+            return False
+        if self.horizontal == 0 and horizontal:
+            return False
+        if self.horizontal:
+            forward = RIGHT if facing_right else LEFT
+            want = forward if self.horizontal == FORWARD else (LEFT | RIGHT) & ~forward
+            if not horizontal & want:
+                return False
+        return True
+
+
+class Command:
+    """コンパイル済みのコマンド（状態機械の定義）"""
+
+    def __init__(self, name, steps, window):
+        self.name = name
+        self.steps = steps
+        self.window = window
+        # shared[i]: i 番目の入力を、前の入力と同じフレームの入力で満たしてよいか
+        # （"26" の 2 と 6 は下+前の斜め1フレームで両方満たせる。"66" のような同じ入力の連続はだめ）
+        self.shared = [i > 0 and steps[i].key() != steps[i - 1].key() for i in range(len(steps))]
+
+
+def compile_command(name, notation, window=30, charge=40):
+    """テンキー表記の文字列を Command に変換する
+
+    window: 最初の入力（溜め技なら溜め終わり）から最後の入力までの猶予フレーム数
+    charge: [d] で書いた溜めに必要なフレーム数
+    """
+    steps = []
+    i = 0
+    while i < len(notation):
+        ch = notation[i]
+        if ch == " ":
+            i += 1
+            continue
+        if ch == "[":
+            end = notation.index("]", i)
+            vertical, horizontal = _NUMPAD[notation[i + 1:end]]
+            steps.append(Step(vertical, horizontal, charge))
+            i = end + 1
+            continue
+        if ch not in _NUMPAD:
+            raise ValueError(f"unknown input '{ch}' in command {name!r}: {notation!r}")
+        vertical, horizontal = _NUMPAD[ch]
+        steps.append(Step(vertical, horizontal))
+        i += 1
+    if not steps:
+        raise ValueError(f"empty command {name!r}")
+    return Command(name, steps, window)
+
+
+class CommandMatcher:
+    """1人分のコマンド判定。毎フレーム feed() し、ready() で成立しているか調べる
+
+    各コマンドについて「i 番目の入力までそろった一番新しい開始フレーム」を覚えておく。
+    下+前のような斜め入力は "2" と "6" の両方を満たすので、1フレームの斜め入力で "26" が成立する
+    （以前の入力履歴での判定と同じ）。同じ入力が続く段（"66" など）は、同じフレームでは2段進まない。
+    """
+
+    def __init__(self, commands):
+        self.commands = list(commands)
+        # starts[c][i]: コマンド c の i 番目までそろった連鎖の開始フレーム（なければ None）
+        self.starts = [[None] * len(c.steps) for c in self.commands]
+        self.held = [[0] * len(c.steps) for c in self.commands]
+        self.index = {c.name: n for n, c in enumerate(self.commands)}
+
+    def feed(self, frame, mask, facing_right):
+        for c, command in enumerate(self.commands):
+            steps = command.steps
+            starts = self.starts[c]
+            before = starts[:]  # このフレームの入力で進める前
+            held = self.held[c]
+            for i in range(len(steps)):
+                step = steps[i]
+                hit = step.matches(mask, facing_right)
+                if step.charge:
+                    held[i] = held[i] + 1 if hit else 0
+                    hit = held[i] >= step.charge
+
+                if not hit:
+                    continue
+                if i == 0:
+                    starts[0] = frame
+                else:
+                    prev = starts[i - 1] if command.shared[i] else before[i - 1]
+                    if prev is not None and frame - prev < command.window:
+                        # 前の段まで満たした連鎖を1段進める（開始フレームは引き継ぐ）
+                        starts[i] = prev
+
+    def ready(self, name, frame):
+        """コマンドが成立していて、まだ猶予時間内なら True"""
+        c = self.index[name]
+        start = self.starts[c][-1]
+        return start is not None and frame - start < self.commands[c].window
+
+    def copy(self):
+        matcher = CommandMatcher.__new__(CommandMatcher)
+        matcher.commands = self.commands
+        matcher.index = self.index
+        matcher.starts = [s[:] for s in self.starts]
+        matcher.held = [h[:] for h in self.held]
+        return matcher
@@ -0,0 +1,292 @@
+"""オンライン対戦（ロールバック方式, UDP）
+
+相手の入力が届くのを待たずに「前と同じ入力のはず」と予測して進め、
+実際の入力が届いて予測が外れていたら、そのフレームの状態に戻して（ロールバック）
+正しい入力で今のフレームまで計算し直す。計算し直すのは最大 MAX_ROLLBACK フレームまで。
+
+    # 中継サーバー（遅延・パケットロスを付けられる）
+    python tools/udp_relay.py --port 7000 --latency 60 --loss 0.05
+
+    # 1P と 2P（別々のターミナルで）
+    python fighting_game/netplay.py --player 1 --port 7001 --remote 127.0.0.1:7000
+    python fighting_game/netplay.py --player 2 --port 7002 --remote 127.0.0.1:7000
+
+--headless を付けるとウィンドウを出さずに乱数入力で --frames フレーム対戦し、
+最後に状態のハッシュを表示する。両方のプロセスで同じ値になれば同期できている。
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import socket
+import struct
+import sys
+import time
+
+import pygame
+
+import main as fighting
+from headless import state_digest
+
+MAX_ROLLBACK = 8   # 予測で先に進めてよいフレーム数
+INPUT_DELAY = 2    # 自分の入力を何フレーム後に使うか（ロールバックの回数を減らす）
+MAX_SEND = 64      # 1パケットに入れる入力の最大数
+
+# パケット: "FG" + 送信者(1/2) + 受け取り済みの最新フレーム + 先頭フレーム + 個数 + 入力バイト列
+HEADER = struct.Struct("!2sBiIB")
+MAGIC = b"FG"
+
+
+class UdpTransport:
+    """UDP でパケットを送受信する（ノンブロッキング）"""
+
+    def __init__(self, port, remote_addr):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("0.0.0.0", port))
+        self.sock.setblocking(False)
+        self.remote_addr = remote_addr
+
+    def send(self, data):
+        try:
+            self.sock.sendto(data, self.remote_addr)
+        except OSError:
+            pass  # 相手がまだ起動していないときなど。次のフレームでまた送る
+
+    def receive(self):
+        packets = []
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(1024)
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+            packets.append(data)
+
+
+class RollbackSession:
+    """ロールバックで2人対戦を進める
+
+    local_player: 自分が 1P(1) か 2P(2) か
+    """
+
+    def __init__(self, game, local_player, transport, input_delay=INPUT_DELAY, max_rollback=MAX_ROLLBACK):
+        self.game = game
+        self.local_player = local_player
+        self.transport = transport
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+
+        self.frame = 0              # 次に計算するフレーム
+        self.local_inputs = {}      # frame -> 自分の入力（1バイト）
+        self.remote_inputs = {}     # frame -> 相手の確定した入力
+        self.predicted = {}         # frame -> 相手の入力として使った予測
+        self.confirmed = -1         # 相手の入力がここまで全部そろっている
+        self.remote_ack = -1        # 相手が自分の入力をここまで受け取った
+        self.snapshots = {}         # frame -> そのフレームを計算する前の状態
+        self.rollback_from = None   # 予測が外れた一番古いフレーム
+
+        # 統計
+        self.rollbacks = 0
+        self.resimulated_frames = 0
+        self.max_resim_frames = 0
+        self.max_resim_ms = 0.0
+        self.stalls = 0
+
+        for f in range(input_delay):
+            self.local_inputs[f] = 0
+
+    # --- 通信 ---------------------------------------------------------
+
+    def send_inputs(self):
+        # 相手が受け取ったと返してくるまで、同じ入力を毎フレーム送り直す（パケットロス対策）
+        last = max(self.local_inputs)
+        first = max(self.remote_ack + 1, 0)
+        last = min(last, first + MAX_SEND - 1)
+        data = bytes(self.local_inputs[f] for f in range(first, last + 1))
+        header = HEADER.pack(MAGIC, self.local_player, self.confirmed, first, len(data))
+        self.transport.send(header + data)
+
+    def poll(self):
+        for packet in self.transport.receive():
+            if len(packet) < HEADER.size:
+                continue
+            magic, sender, ack, first, count = HEADER.unpack_from(packet)
+            if magic != MAGIC or sender == self.local_player:
+                continue
+            self.remote_ack = max(self.remote_ack, ack)
+            data = packet[HEADER.size:HEADER.size + count]
+            for i, bits in enumerate(data):
+                self.receive_remote(first + i, bits)
+
+    def receive_remote(self, frame, bits):
+        if frame in self.remote_inputs:
+            return
+        self.remote_inputs[frame] = bits
+        while self.confirmed + 1 in self.remote_inputs:
+            self.confirmed += 1
+
+        guessed = self.predicted.get(frame)
+        if guessed is not None and guessed != bits:
+            if self.rollback_from is None or frame < self.rollback_from:
+                self.rollback_from = frame
+
+    # --- 進行 ---------------------------------------------------------
+
+    def predict(self, frame):
+        """相手の入力が未着なら、最後に届いた入力が続いていると予測する"""
+        bits = self.remote_inputs.get(frame)
+        if bits is not None:
+            return bits
+        if self.confirmed >= 0:
+            return self.remote_inputs[self.confirmed]
+        return 0
+
+    def simulate(self, frame):
+        self.snapshots[frame] = self.game.save_state()
+        local = self.local_inputs[frame]
+        remote = self.predict(frame)
+        if frame not in self.remote_inputs:
+            self.predicted[frame] = remote
+        else:
+            self.predicted.pop(frame, None)
+
+        if self.local_player == 1:
+            p1, p2 = local, remote
+        else:
+            p1, p2 = remote, local
+        self.game.handle_versus_input(fighting.unpack_inputs(p1), fighting.unpack_inputs(p2))
+        self.game.update()
+
+    def rollback(self):
+        start = self.rollback_from
+        self.rollback_from = None
+        if start is None or start >= self.frame:
+            return
+        t0 = time.perf_counter()
+        self.game.load_state(self.snapshots[start])
+        for f in range(start, self.frame):
+            self.simulate(f)
+        count = self.frame - start
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        self.rollbacks += 1
+        self.resimulated_frames += count
+        self.max_resim_frames = max(self.max_resim_frames, count)
+        self.max_resim_ms = max(self.max_resim_ms, elapsed_ms)
+
+    def advance(self, local_inputs):
+        """1フレーム進める。相手が遅れすぎているときは進めずに False を返す"""
+        self.poll()
+        self.rollback()
+
+        if self.frame - self.confirmed > self.max_rollback:
+            self.stalls += 1
+            self.send_inputs()
+            return False
+
+        self.local_inputs[self.frame + self.input_delay] = fighting.pack_inputs(local_inputs)
+        self.send_inputs()
+        self.simulate(self.frame)
+        self.frame += 1
+        self.prune()
+        return True
+
+    def prune(self):
+        # 確定済みのフレームより前の保存状態はもう使わない
+        keep = min(self.confirmed, self.frame - 1) - 1
+        for table in (self.snapshots, self.predicted):
+            for f in [f for f in table if f < keep]:
+                del table[f]
+        for f in [f for f in self.local_inputs if f < min(keep, self.remote_ack)]:
+            del self.local_inputs[f]
+
+    def stats(self):
+        return (f"frame {self.frame}, confirmed {self.confirmed}, rollbacks {self.rollbacks}, "
+                f"resimulated {self.resimulated_frames} (max {self.max_resim_frames} frames / "
+                f"{self.max_resim_ms:.2f} ms), stalls {self.stalls}")
+
+
+def parse_addr(text):
+    host, port = text.rsplit(":", 1)
+    return host, int(port)
+
+
+def create_game(args):
+    game = fighting.Game(seed=args.seed, versus=True)
+    game.selected_char = args.p1_char
+    game.p2_char = args.p2_char
+    game.start_game()
+    return game
+
+
+def run_headless(args, session):
+    """乱数入力で対戦し、全員の入力がそろったところで状態のハッシュを出す"""
+    rng = random.Random(args.player * 1000 + args.seed)
+    inputs = fighting.NO_INPUT
+    clock = pygame.time.Clock()
+    while session.frame < args.frames:
+        if session.frame % 10 == 0:
+            inputs = {key: rng.random() < 0.25 for key in fighting.INPUT_KEYS}
+            inputs["R"] = False
+        session.advance(inputs)
+        clock.tick(fighting.FPS)
+
+    # 相手の入力が最後まで届くのを待ってから、もう一度正しい入力で計算し直す
+    deadline = time.time() + 5
+    while session.confirmed < args.frames - 1 and time.time() < deadline:
+        session.poll()
+        session.send_inputs()
+        time.sleep(0.005)
+    session.rollback()
+
+    digest = hashlib.sha256(repr(state_digest(session.game)).encode()).hexdigest()[:16]
+    print(session.stats())
+    print(f"state at frame {session.frame}: {digest}")
+
+
+async def run_window(args, session):
+    fighting.init_display()
+    game = session.game
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+
+        inputs = game.read_keyboard()
+        inputs["R"] = False
+        session.advance(inputs)
+        game.draw()
+        pygame.display.flip()
+        fighting.clock.tick(fighting.FPS)
+        await asyncio.sleep(0)
+
+    print(session.stats())
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollback netplay over UDP")
+    parser.add_argument("--player", type=int, choices=(1, 2), required=True)
+    parser.add_argument("--port", type=int, required=True, help="自分が受信するポート")
+    parser.add_argument("--remote", type=parse_addr, required=True, help="相手（または中継サーバー）の HOST:PORT")
+    parser.add_argument("--seed", type=int, default=0, help="両方で同じ値にする")
+    parser.add_argument("--p1-char", default="BALANCE", choices=list(fighting.CHAR_TYPES))
+    parser.add_argument("--p2-char", default="BALANCE", choices=list(fighting.CHAR_TYPES))
+    parser.add_argument("--delay", type=int, default=INPUT_DELAY, help="入力遅延フレーム数")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--frames", type=int, default=600, help="--headless で対戦するフレーム数")
+    args = parser.parse_args()
+
+    game = create_game(args)
+    session = RollbackSession(game, args.player, UdpTransport(args.port, args.remote), input_delay=args.delay)
+    if args.headless:
+        run_headless(args, session)
+    else:
+        asyncio.run(run_window(args, session))
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""ゲームオーバー・クリア画面の半透明オーバーレイ
+
+以前は表示中のフレームごとに全画面サイズの Surface を作り直していた。
+ここでは「半透明の幕 + 文字」を一度だけ合成して、あとは完成品を blit するだけにする。
+"""
+import pygame
+
+
+class OverlayManager:
+    """key ごとに合成済みのオーバーレイを持っておく
+
+    allocations は作った Surface の数。表示中に増え続けていたら作り直しが起きている。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.overlays = {}
+        self.allocations = 0
+
+    def get(self, key, color, alpha, compose):
+        """color / alpha の幕に compose(surface) で文字を描いたものを返す"""
+        overlay = self.overlays.get(key)
+        if overlay is None:
+            overlay = pygame.Surface(self.size, pygame.SRCALPHA)
+            overlay.fill((*color, alpha))
+            compose(overlay)
+            self.allocations += 1
+            self.overlays[key] = overlay
+        return overlay
+
+    def clear(self):
+        self.overlays.clear()
@@ -0,0 +1,158 @@
+"""リプレイの記録と再生
+
+記録するのは「シード・選んだキャラ・開始ステージ・敵AIの設定」と、1フレーム1バイトのプレイヤー入力だけ。
+ゲームは同じシードと同じ入力なら必ず同じ結果になるので、これだけで試合を再現できる。
+1分で約3.5KB（60フレーム × 1バイト + ヘッダー）。
+
+    python main.py --record replays          # 遊んだ試合を replays/ に保存
+    python main.py --replay replays/xxx.fgr  # 再生（← → で10秒ずつ移動）
+    python replay.py replays/xxx.fgr --seek 1800   # 画面なしで指定フレームまで進めて状態を表示
+"""
+import os
+import struct
+import time
+
+# ヘッダー: マジック, バージョン, シード, 開始ステージ, キャラ名の長さ
+# このあとに キャラ名, 敵AIの種類の長さ(1バイト) + 敵AIの種類, 敵AIの反応の遅れ(1バイト, NO_LATENCY なら別スレッドを使わない)
+# 形式を変えたら VERSION を上げる（違うバージョンのファイルは読まない）
+HEADER = struct.Struct("<4sBQBB")
+MAGIC = b"FGRP"
+VERSION = 1
+NO_LATENCY = 255
+
+FLUSH_FRAMES = 300  # 何フレーム分たまったらファイルに書き出すか（5秒）
+RECORD_MASK = 0x7F  # UP/DOWN/LEFT/RIGHT/Z/X/SPACE だけ記録する（R は記録しない）
+
+
+class ReplayWriter:
+    """試合中の入力を少しずつファイルに書き足していく
+
+    1フレームごとに書き込むとディスク待ちが起きるので、メモリにためて数秒ごとにまとめて書く。
+    """
+
+    def __init__(self, path, seed, char, level, ai="heuristic", ai_latency=None):
+        self.path = path
+        self.file = open(path, "wb")
+        name = char.encode("ascii")
+        ai_name = ai.encode("ascii")
+        latency = NO_LATENCY if ai_latency is None else ai_latency
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, level, len(name)) + name
+                        + bytes([len(ai_name)]) + ai_name + bytes([latency]))
+        self.pending = bytearray()
+        self.frames = 0
+
+    @classmethod
+    def create(cls, directory, seed, char, level, ai="heuristic", ai_latency=None):
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("%Y%m%d_%H%M%S") + f"_{char}.fgr"
+        return cls(os.path.join(directory, name), seed, char, level, ai, ai_latency)
+
+    def record(self, bits):
+        self.pending.append(bits & RECORD_MASK)
+        self.frames += 1
+        if len(self.pending) >= FLUSH_FRAMES:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.pending)
+            self.file.flush()
+            self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class ReplayReader:
+    """リプレイファイルを読み込んで、1フレームずつ入力を返す"""
+
+    def __init__(self, seed, char, level, inputs, ai="heuristic", ai_latency=None):
+        self.seed = seed
+        self.char = char
+        self.level = level
+        self.ai = ai
+        self.ai_latency = ai_latency
+        self.inputs = inputs
+        self.frame = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, level, name_len = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} replay (this game reads version {VERSION})")
+        start = HEADER.size
+        char = data[start:start + name_len].decode("ascii")
+        start += name_len
+        ai_len = data[start]
+        ai = data[start + 1:start + 1 + ai_len].decode("ascii")
+        start += 1 + ai_len
+        ai_latency = None if data[start] == NO_LATENCY else data[start]
+        start += 1
+        return cls(seed, char, level, data[start:], ai, ai_latency)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def finished(self):
+        return self.frame >= len(self.inputs)
+
+    def next_bits(self):
+        if self.finished():
+            return 0
+        bits = self.inputs[self.frame]
+        self.frame += 1
+        return bits
+
+
+def start_playback(game, reader):
+    """リプレイの最初の状態から再生を始める"""
+    reader.frame = 0
+    game.selected_char = reader.char
+    game.ai = reader.ai
+    game.ai_latency = reader.ai_latency
+    game.start_game(reader.level, seed=reader.seed)
+    game.replay = reader
+
+
+def seek(game, reader, frame):
+    """描画せずに最速で計算して、指定フレームまで進める（戻るときは最初から計算し直す）"""
+    frame = max(0, min(frame, len(reader)))
+    if frame < reader.frame:
+        start_playback(game, reader)
+    while reader.frame < frame:
+        game.handle_input()
+        game.update()
+
+
+def main():
+    import argparse
+
+    import main as fighting
+    from headless import state_digest
+
+    parser = argparse.ArgumentParser(description="Inspect a fighting game replay")
+    parser.add_argument("path")
+    parser.add_argument("--seek", type=int, default=None, help="このフレームまで進める（省略時は最後まで）")
+    args = parser.parse_args()
+
+    reader = ReplayReader.load(args.path)
+    game = fighting.Game()
+    start_playback(game, reader)
+    start = time.perf_counter()
+    seek(game, reader, len(reader) if args.seek is None else args.seek)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{reader.char} from stage {reader.level} ({reader.ai} AI), seed {reader.seed}, {len(reader)} frames")
+    print(f"seeked to frame {reader.frame} in {elapsed_ms:.1f} ms")
+    print(f"stage {game.current_level}, state {game.state}, "
+          f"HP {game.player.health:.0f} vs {game.enemy.health:.0f}, time {game.round_time}")
+    print(state_digest(game))
+
+
+if __name__ == "__main__":
+    main()
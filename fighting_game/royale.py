@@ -0,0 +1,327 @@
+"""バトルロイヤル（プレイヤー + 最大32人のAI、最後の1人になったら勝ち）
+
+全員が「x 座標で一番近い相手」を狙う。毎フレーム生きている全員を x でソートしておけば、
+一番近い相手はソート順で両隣のどちらかなので、総当たりで探さなくてよい。
+攻撃の当たり判定も同じ並びを使い、攻撃の Rect の範囲に左端が入る相手だけを二分探索で調べる
+（ソート&スイープ）。飛び道具は projectiles.py のプールのスイープをそのまま使う。
+
+    python fighting_game/royale.py --fighters 32
+    python fighting_game/royale.py --bench --fighters 32 --frames 1200   # 60FPS を保てるかの計測
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from bisect import bisect_left
+
+import pygame
+
+import main as fighting
+from common.adaptive import AdaptiveQuality, HIGH
+from common.timestep import FixedTimestep
+from main import SCREEN_WIDTH, WHITE, BLACK, RED, YELLOW, GRAY, text_cache
+
+MAX_FIGHTERS = 32
+ROUND_SECONDS = 99
+POSE_CACHE_SIZE = 192  # 敵のレベル（色）が全部そろうのでポーズ画像キャッシュを大きくする
+
+# HUD の体力バー（全員分を画面上部にまとめて並べる）
+BAR_W, BAR_H = 60, 8
+BAR_GAP = 6
+BAR_COLUMNS = 17
+BAR_TOP = 10
+
+
+def nearest_targets(fighters):
+    """x でソート済みの fighters それぞれについて、一番近い相手を返す"""
+    targets = []
+    last = len(fighters) - 1
+    for i, f in enumerate(fighters):
+        left = fighters[i - 1] if i > 0 else None
+        right = fighters[i + 1] if i < last else None
+        if left is None or (right is not None and right.x - f.x < f.x - left.x):
+            targets.append(right)
+        else:
+            targets.append(left)
+    return targets
+
+
+def sweep_attacks(fighters):
+    """x でソート済みの fighters で、攻撃が当たった (攻撃した人, 当たった人) の組を返す"""
+    hurts = [f.get_hurt_rect() for f in fighters]
+    lefts = [r.left for r in hurts]
+    max_width = max(r.width for r in hurts)
+    pairs = []
+    for attacker in fighters:
+        rect = attacker.get_attack_rect()
+        if rect is None:
+            continue
+        # 喰らい判定の左端が (攻撃の左端 - 幅) 〜 攻撃の右端 にいる相手だけ調べる
+        j = bisect_left(lefts, rect.left - max_width)
+        while j < len(fighters) and lefts[j] < rect.right:
+            target = fighters[j]
+            if target is not attacker and rect.colliderect(hurts[j]):
+                pairs.append((attacker, target))
+            j += 1
+    return pairs
+
+
+class RoyaleGame(fighting.Game):
+    """fighters 人の AI とプレイヤーのバトルロイヤル（キャラ選択や入力処理は Game と同じ）"""
+
+    def __init__(self, fighters=MAX_FIGHTERS, seed=None, realtime=True):
+        super().__init__(seed=seed, realtime=realtime)
+        self.num_ai = max(1, min(MAX_FIGHTERS, fighters))
+        self.place = 0
+        fighting.pose_cache.maxsize = max(fighting.pose_cache.maxsize, POSE_CACHE_SIZE)
+
+        # HUD の体力バーの位置（プレイヤーが0番）
+        self.bar_rects = []
+        for i in range(self.num_ai + 1):
+            col, row = i % BAR_COLUMNS, i // BAR_COLUMNS
+            x = 20 + col * (BAR_W + BAR_GAP)
+            y = BAR_TOP + row * (BAR_H + BAR_GAP)
+            self.bar_rects.append(pygame.Rect(x, y, BAR_W, BAR_H))
+        self.fill_rect = pygame.Rect(0, 0, 0, BAR_H)
+
+    def reset_round(self):
+        self.player = fighting.Fighter(SCREEN_WIDTH // 2, 1, self.selected_char)
+        self.enemy = None
+        self.enemy_ai = None
+        self.fighters = [self.player]
+        self.ais = {}
+        for i in range(self.num_ai):
+            x = 60 + (SCREEN_WIDTH - 120) * i / max(self.num_ai - 1, 1)
+            level = self.rng.randint(1, 5)
+            f = fighting.Fighter(x, i + 2, "BALANCE", level)
+            self.fighters.append(f)
+            self.ais[f] = fighting.EnemyAI(f, level, self)
+        self.alive = list(self.fighters)
+
+        self.projectiles.clear()
+        self.round_time = ROUND_SECONDS
+        self.frame_count = 0
+        self.game_over = False
+        self.game_cleared = False
+        self.winner = None
+        self.start_delay = 60
+        self.place = 0
+
+    def update(self):
+        if self.state != "GAME":
+            return
+        if self.start_delay > 0:
+            self.start_delay -= 1
+            return
+        if self.game_over:
+            return
+
+        alive = self.alive
+        alive.sort(key=lambda f: f.x)
+        targets = nearest_targets(alive)
+        for f, target in zip(alive, targets):
+            ai = self.ais.get(f)
+            if ai:
+                ai.update(target)
+            f.update(target)
+
+        self.projectiles.update()
+        self.check_collision()
+
+        self.frame_count += 1
+        if self.frame_count >= fighting.FPS:
+            self.frame_count = 0
+            self.round_time -= 1
+
+        self.alive = [f for f in alive if f.health > 0]
+        if self.player.health <= 0 or len(self.alive) <= 1 or self.round_time <= 0:
+            self.end_round()
+
+    def check_collision(self):
+        alive = sorted(self.alive, key=lambda f: f.x)  # 移動したので並べ直す（ほぼ並んでいるので速い）
+        for attacker, target in sweep_attacks(alive):
+            target.take_damage(attacker.attack_damage())
+
+        self.projectiles.sort()
+        for a, b in self.projectiles.clashes():
+            a.active = False
+            b.active = False
+        for target in alive:
+            for p in self.projectiles.hits(target.get_hurt_rect()):
+                if p.owner is target or not p.active:
+                    continue
+                target.take_damage(15 * p.owner.power_mult)
+                p.active = False
+
+    def end_round(self):
+        self.game_over = True
+        for f in self.alive:
+            f.settle()
+        # 順位 = 自分より体力の多い生き残りの数 + 1
+        survivors = [f for f in self.alive if f is not self.player]
+        if self.player.health <= 0:
+            self.place = len(survivors) + 1
+        else:
+            self.place = 1 + sum(1 for f in survivors if f.health > self.player.health)
+        if self.place == 1:
+            self.winner = self.player
+            self.game_cleared = True
+
+    # --- 描画 ---------------------------------------------------------
+
+    def draw(self):
+        if self.state == "SELECT":
+            self.draw_select_screen()
+        else:
+            self.draw_game_screen()
+
+    def draw_game_screen(self):
+        screen = fighting.screen
+        self.background.draw(screen)
+        detail = self.quality == HIGH
+        for f in self.alive:
+            f.draw(screen, self.alpha, detail)
+        # プレイヤーの目印
+        px, py = self.player.draw_pos(self.alpha)
+        py -= 125
+        pygame.draw.polygon(screen, YELLOW, [(px - 8, py - 10), (px + 8, py - 10), (px, py)])
+        for p in self.projectiles:
+            p.draw(screen, detail)
+        self.draw_ui()
+
+        if self.start_delay > 0:
+            text = text_cache.render(fighting.font_large, f"BATTLE ROYALE - {len(self.fighters)} FIGHTERS", BLACK)
+            screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, fighting.SCREEN_HEIGHT // 2 - 50))
+        if self.game_cleared:
+            self.draw_game_clear()
+        elif self.game_over:
+            self.draw_game_over()
+
+    def draw_ui(self):
+        """全員の体力バーを小さくまとめて描く（枠 → 中身の順に fill するだけ）"""
+        screen = fighting.screen
+        fill = self.fill_rect
+        for i, f in enumerate(self.fighters):
+            rect = self.bar_rects[i]
+            screen.fill(GRAY, rect)
+            if f.health > 0:
+                fill.topleft = rect.topleft
+                fill.width = int(BAR_W * f.health / f.max_health)
+                screen.fill(fighting.BLUE if f is self.player else RED, fill)
+        screen.fill(YELLOW, self.bar_rects[0].inflate(4, 4), special_flags=pygame.BLEND_MAX)
+
+        left = text_cache.render(fighting.font_small, f"{len(self.alive)} LEFT  TIME {self.round_time}", BLACK)
+        screen.blit(left, (SCREEN_WIDTH - left.get_width() - 20, fighting.SCREEN_HEIGHT - 40))
+
+    def draw_game_over(self):
+        key = ("royale_over", self.place)
+        fighting.screen.blit(self.overlays.get(key, BLACK, 180, self.compose_game_over), (0, 0))
+
+    def compose_game_over(self, overlay):
+        h = fighting.SCREEN_HEIGHT
+        text = text_cache.render(fighting.font_large, "GAME OVER", RED)
+        overlay.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, h // 2 - 50))
+        info = text_cache.render(fighting.font_medium, f"Place: {self.place} / {len(self.fighters)}", WHITE)
+        overlay.blit(info, (SCREEN_WIDTH // 2 - info.get_width() // 2, h // 2 + 20))
+        retry = text_cache.render(fighting.font_medium, fighting.ui_text("retry"), WHITE)
+        overlay.blit(retry, (SCREEN_WIDTH // 2 - retry.get_width() // 2, h // 2 + 80))
+
+
+async def run_window(args):
+    fighting.init_display()
+    game = RoyaleGame(args.fighters, seed=args.seed)
+    timestep = FixedTimestep(fighting.FPS, fighting.MAX_STEPS)
+    adaptive = AdaptiveQuality(fighting.FPS, fighting.ADAPTIVE, verbose=fighting.ADAPTIVE)
+    running = True
+    while running:
+        adaptive.begin_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+            game.handle_events(event)
+        for _ in range(timestep.advance()):
+            game.handle_input()
+            game.update()
+        game.alpha = timestep.alpha
+        game.quality = adaptive.quality
+        if adaptive.should_render():
+            game.draw()
+            pygame.display.flip()
+        adaptive.presented()
+        adaptive.end_frame(fighting.clock.tick(fighting.RENDER_FPS))
+        await asyncio.sleep(0)
+    pygame.quit()
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def run_bench(args):
+    """描画込みで args.frames フレーム動かし、1フレームにかかった時間を表示する（プレイヤーもAIが操作）"""
+    fighting.init_display()
+    game = RoyaleGame(args.fighters, seed=args.seed)
+    update_ms, draw_ms = [], []
+    frames = 0
+    while frames < args.frames:
+        if game.state != "GAME" or game.game_over:
+            game.start_game()  # 決着がついたら同じ人数でやり直す
+            game.start_delay = 0
+            game.ais[game.player] = fighting.EnemyAI(game.player, 3, game)
+        t0 = time.perf_counter()
+        game.update()
+        t1 = time.perf_counter()
+        game.draw()
+        pygame.display.flip()
+        t2 = time.perf_counter()
+        update_ms.append((t1 - t0) * 1000)
+        draw_ms.append((t2 - t1) * 1000)
+        frames += 1
+
+    total = sorted(u + d for u, d in zip(update_ms, draw_ms))
+    budget = 1000 / fighting.FPS
+    result = {
+        "fighters": args.fighters + 1,
+        "frames": frames,
+        "update_mean_ms": sum(update_ms) / frames,
+        "draw_mean_ms": sum(draw_ms) / frames,
+        "frame_mean_ms": sum(total) / frames,
+        "frame_p95_ms": percentile(total, 95),
+        "frame_p99_ms": percentile(total, 99),
+        "frame_max_ms": total[-1],
+        "over_budget": sum(1 for t in total if t > budget),
+    }
+    result["ok_60fps"] = result["frame_p99_ms"] <= budget
+    print(f"{result['fighters']} fighters, {frames} frames: update {result['update_mean_ms']:.2f} ms + "
+          f"draw {result['draw_mean_ms']:.2f} ms, p95 {result['frame_p95_ms']:.2f} / "
+          f"p99 {result['frame_p99_ms']:.2f} / max {result['frame_max_ms']:.2f} ms, "
+          f"{result['over_budget']} frames over {budget:.1f} ms -> {'OK' if result['ok_60fps'] else 'TOO SLOW'} for 60 FPS")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    pygame.quit()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Battle royale: the player against up to 32 AI fighters")
+    parser.add_argument("--fighters", type=int, default=MAX_FIGHTERS, help="AI の人数（最大32）")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--bench", action="store_true", help="60FPS を保てるか計測する")
+    parser.add_argument("--frames", type=int, default=1200, help="--bench で計測するフレーム数")
+    parser.add_argument("--json", help="--bench の結果を保存するファイル")
+    args = parser.parse_args()
+    if args.bench:
+        if args.seed is None:
+            args.seed = 0
+        result = run_bench(args)
+        sys.exit(0 if result["ok_60fps"] else 1)
+    asyncio.run(run_window(args))
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
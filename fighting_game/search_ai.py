@@ -0,0 +1,177 @@
+"""先読みで行動を選ぶ敵AI（モンテカルロ・ロールアウト）
+
+行動を決めるタイミングで、候補の行動（PLANS）それぞれについて
+「その行動をとったあと HORIZON フレーム先まで」を実際の Fighter で何度かシミュレーションし、
+与えたダメージ − 受けたダメージ の平均が一番よいものを選ぶ。
+相手（プレイヤー）の動きはわからないので、ロールアウトごとにランダムな動きを当てはめる。
+
+1フレームに使ってよい時間（budget_us マイクロ秒）を超えたらそこで打ち切り、
+そこまでの結果で決める（anytime）。候補を一巡もできなかったときは None を返すので、
+呼び出し側は今まで通りの確率で決める AI に任せる。
+
+時間で打ち切ると実行するたびに結果が変わるので、ヘッドレス実行やリプレイでは
+時間ではなく rounds（全候補を何巡するか）で打ち切って、毎回同じ判断になるようにする。
+"""
+import random
+import time
+
+from projectiles import ProjectilePool
+
+HORIZON = 30          # 何フレーム先まで読むか
+BUDGET_US = 4000      # 1フレームで先読みに使ってよい時間（マイクロ秒）
+ROUNDS = 2            # 時間で打ち切らないときに全候補を何巡するか
+TAKEN_WEIGHT = 1.2    # 受けたダメージを与えたダメージより少し重く見る（守りも考える）
+
+# 候補の行動と、その行動を続けるフレーム数（EnemyAI の state と timer になる）
+PLANS = (
+    ("wait", 10),
+    ("chase", 10),
+    ("retreat", 10),
+    ("jump", 20),
+    ("guard", 15),
+    ("punch", 20),
+    ("kick", 30),
+    ("slide", 40),
+    ("shoot", 30),
+)
+
+# ロールアウト中のプレイヤーの動き（OPPONENT_EVERY フレームごとに選び直す）
+OPPONENT_MOVES = ("wait", "chase", "retreat", "punch", "kick", "guard", "jump")
+OPPONENT_EVERY = 8
+
+
+def apply_plan(fighter, opponent, state, first, sandbox):
+    """EnemyAI._execute_action と同じように、行動を Fighter の操作に変える"""
+    if state != "guard":
+        fighter.guard(False)
+    toward = 1 if opponent.x > fighter.x else -1
+    if state == "chase":
+        fighter.move(toward)
+    elif state == "retreat":
+        fighter.move(-toward)
+    elif state == "guard":
+        fighter.guard(True)
+    elif state == "wait":
+        fighter.move(0)
+    elif first:
+        # 1回だけ出す技
+        if state == "shoot":
+            fighter.shoot(sandbox)
+        else:
+            getattr(fighter, state)()
+
+
+def exchange_hits(attacker, defender):
+    rect = attacker.get_attack_rect()
+    if rect and rect.colliderect(defender.get_hurt_rect()):
+        defender.take_damage(attacker.attack_damage())
+
+
+class RolloutPlanner:
+    """ロールアウトで次の行動を選ぶ
+
+    ロールアウトは本物の Fighter を使い、終わったら元の状態に戻す。
+    飛び道具は本物を壊さないよう、自分用のプールに写してから動かす。
+    """
+
+    def __init__(self, projectile_factory, seed, horizon=HORIZON, budget_us=BUDGET_US, rounds=ROUNDS):
+        self.rng = random.Random(seed)
+        self.horizon = horizon
+        self.budget_us = budget_us
+        self.rounds = rounds
+        self.projectiles = ProjectilePool(projectile_factory, 8)  # shoot(self) で使われる
+
+        # 統計
+        self.decisions = 0
+        self.fallbacks = 0
+        self.rollouts = 0
+        self.search_ns = 0
+        self.last_us = 0
+
+    def decide(self, me, opponent, projectiles, deterministic=False):
+        """(state, timer) を返す。時間内に候補を一巡できなければ None"""
+        start = time.perf_counter_ns()
+        deadline = start + self.budget_us * 1000
+        me_state = me.__dict__.copy()
+        opp_state = opponent.__dict__.copy()
+        shots = projectiles.snapshot()
+
+        n = len(PLANS)
+        totals = [0.0] * n
+        count = 0  # 候補を順番に回すので、count // n が何巡したか
+        cost = 0   # 直前のロールアウト1回にかかった時間。次の1回が締め切りを越えそうならやめる
+        while True:
+            now = time.perf_counter_ns()
+            if deterministic:
+                if count >= self.rounds * n:
+                    break
+            elif now + cost >= deadline:
+                break
+            state, commit = PLANS[count % n]
+            totals[count % n] += self.rollout(me, opponent, me_state, opp_state, state, commit, shots)
+            cost = time.perf_counter_ns() - now
+            count += 1
+
+        # ロールアウトで動かした Fighter を元に戻す
+        me.__dict__.update(me_state)
+        opponent.__dict__.update(opp_state)
+
+        elapsed = time.perf_counter_ns() - start
+        self.search_ns += elapsed
+        self.last_us = elapsed // 1000
+        self.decisions += 1
+        if count < n:
+            # 候補を一巡する前に時間切れ → 比べられないので任せる
+            self.fallbacks += 1
+            return None
+        # 巡回の途中で打ち切ったときは回数が違うので平均で比べる
+        best = max(range(n), key=lambda i: totals[i] / ((count - i - 1) // n + 1))
+        return PLANS[best]
+
+    def rollout(self, me, opponent, me_state, opp_state, state, commit, shots):
+        """1回分のシミュレーション。結果の点数を返す（高いほど自分に有利）"""
+        me.__dict__.update(me_state)
+        opponent.__dict__.update(opp_state)
+        rng = self.rng
+        me_hp = me.health
+        opp_hp = opponent.health
+        pool = self.projectiles
+        pool.restore(shots)
+        opp_move = "wait"
+
+        for t in range(self.horizon):
+            if t < commit:
+                apply_plan(me, opponent, state, t == 0, self)
+            else:
+                apply_plan(me, opponent, "wait", False, self)
+            if t % OPPONENT_EVERY == 0:
+                opp_move = rng.choice(OPPONENT_MOVES)
+                first = True
+            else:
+                first = False
+            apply_plan(opponent, me, opp_move, first, self)
+
+            # Game.update と同じ順番で進める
+            opponent.update(me)
+            me.update(opponent)
+            exchange_hits(opponent, me)
+            exchange_hits(me, opponent)
+            if pool.active:
+                pool.update()
+                pool.sort()
+                for target in (me, opponent):
+                    for p in pool.hits(target.get_hurt_rect()):
+                        if p.owner is not target and p.active:
+                            target.take_damage(15 * p.owner.power_mult)
+                            p.active = False
+            if me.health <= 0 or opponent.health <= 0:
+                break
+
+        self.rollouts += 1
+        return (opp_hp - opponent.health) - (me_hp - me.health) * TAKEN_WEIGHT
+
+    def stats(self):
+        mean_us = self.search_ns / 1000 / max(self.decisions, 1)
+        per_sec = self.decisions / max(self.search_ns / 1e9, 1e-9)
+        return (f"{self.decisions} decisions ({per_sec:.0f}/s of search time), {self.rollouts} rollouts, "
+                f"mean {mean_us:.0f} us, fallbacks {self.fallbacks}")
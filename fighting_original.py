@@ -1,7 +1,11 @@
+import os
 import pygame
 import sys
 import random
 
+from common.font_resolver import load_font
+from common.glyph_atlas import GlyphFont, atlas_exists
+
 # 初期化
 pygame.init()
 
@@ -26,10 +30,18 @@ GRAY = (100, 100, 100)
 PURPLE = (128, 0, 128)
 
 # フォント設定
+# ブラウザ版と同じグリフアトラス（tools/build_glyph_atlas.py で作る）があれば、それで日本語を描く
+# PyInstaller の --onefile では --add-data で入れたファイルが sys._MEIPASS に展開される
+BASE_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+GLYPH_DIR = os.path.join(BASE_DIR, "fighting_game", "assets")
+
 def get_font(size):
-    # EXE版なのでシステムフォントを優先的に探す
+    if atlas_exists(GLYPH_DIR, size):
+        return GlyphFont(GLYPH_DIR, size)
+    # アトラスがなければシステムフォントを探す
+    # （見つけた場所はキャッシュしておき、次回の起動からは探さずにファイルから読み込む）
     font_names = ["meiryo", "msgothic", "yugothic", "arial"]
-    return pygame.font.SysFont(font_names, size)
+    return load_font(size, font_names)
 
 font_small = get_font(32)
 font_medium = get_font(48)
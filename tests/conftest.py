@@ -0,0 +1,9 @@
+"""テスト共通の設定（画面なしで pygame を動かし、fighting_game のモジュールを import できるようにする）"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,20 @@
+"""ゲームオーバー・クリア画面のオーバーレイが表示中に作り直されないこと"""
+import main as fighting
+
+
+def test_overlays_are_composed_once():
+    fighting.init_display()
+    game = fighting.Game(seed=0, realtime=False)
+    game.start_game(game.max_levels)
+    game.start_delay = 0
+
+    game.game_over = True
+    game.winner = game.enemy
+    for _ in range(300):
+        game.draw()
+    game.game_cleared = True
+    game.winner = game.player
+    for _ in range(300):
+        game.draw()
+
+    assert game.overlays.allocations == 2  # ゲームオーバーとクリアで1枚ずつ
@@ -0,0 +1,158 @@
+"""キャラクター × 敵レベルのバランス表を作るツール
+
+全キャラ(CHAR_TYPES) × 敵レベル(1〜5) の組み合わせをヘッドレスで N 回ずつ対戦させ、
+勝率・平均ラウンド時間・与ダメージを表にする。対戦はプロセスプールで全コアに分散する。
+
+結果は組み合わせごとに .balance_cache/ に保存される。キャッシュのキーは
+そのキャラと敵の設定値から作るので、1キャラだけ調整した場合は
+そのキャラの組み合わせだけが再計算される。
+
+    python tools/balance_matrix.py --runs 200
+    python tools/balance_matrix.py --chars POWER --levels 4 5 --json result.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+
+import main as fighting  # noqa: E402
+from headless import simulate_round  # noqa: E402
+
+CACHE_DIR = os.path.join(ROOT, ".balance_cache")
+
+# 対戦ロジック（Fighter.update / check_collision など）を変えたら上げる
+#   1: 最初の版
+#   2: 飛び道具どうしがぶつかると相殺する（飛び道具のプールとスイープを入れたとき）
+SIM_VERSION = 2
+
+
+def matchup_config(char, level, player_ai_level):
+    """その組み合わせの結果に影響する設定値を集める"""
+    game = fighting.Game(seed=0, realtime=False)
+    game.selected_char = char
+    game.start_game(level)
+    config = {"sim_version": SIM_VERSION, "char": char, "level": level, "player_ai": player_ai_level}
+    for side, f in (("player", game.player), ("enemy", game.enemy)):
+        config[side] = {
+            "hp": f.max_health,
+            "speed": f.move_speed,
+            "jump": f.jump_power,
+            "power": f.power_mult,
+        }
+    config["enemy_ai"] = game.enemy_ai.params  # ai_params.json を作り直したら再計算される
+    return config
+
+
+def config_key(config, runs):
+    data = json.dumps({"config": config, "runs": runs}, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def run_chunk(char, level, player_ai_level, seeds):
+    results = []
+    for seed in seeds:
+        results.append(simulate_round(char, level, seed, player_ai_level=player_ai_level))
+    return results
+
+
+def summarize(results):
+    n = len(results)
+    wins = sum(1 for r in results if r["winner"] == "player")
+    return {
+        "runs": n,
+        "win_rate": wins / n,
+        "avg_round_sec": sum(r["frames"] for r in results) / n / fighting.FPS,
+        "avg_damage_dealt": sum(r["damage_dealt"] for r in results) / n,
+        "avg_damage_taken": sum(r["damage_taken"] for r in results) / n,
+    }
+
+
+def load_cached(key):
+    path = os.path.join(CACHE_DIR, key + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cached(key, summary):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, key + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+
+def run_matrix(chars, levels, runs, player_ai_level, workers=None, chunk_size=25, use_cache=True):
+    matrix = {}
+    pending = {}
+    for char in chars:
+        for level in levels:
+            key = config_key(matchup_config(char, level, player_ai_level), runs)
+            cached = load_cached(key) if use_cache else None
+            if cached is not None:
+                matrix[(char, level)] = cached
+            else:
+                pending[(char, level)] = key
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for (char, level) in pending:
+                for start in range(0, runs, chunk_size):
+                    seeds = range(start, min(start + chunk_size, runs))
+                    future = pool.submit(run_chunk, char, level, player_ai_level, list(seeds))
+                    futures.setdefault((char, level), []).append(future)
+
+            for pair, chunk_futures in futures.items():
+                results = []
+                for future in chunk_futures:
+                    results.extend(future.result())
+                summary = summarize(results)
+                save_cached(pending[pair], summary)
+                matrix[pair] = summary
+
+    return matrix, len(pending)
+
+
+def print_matrix(matrix, chars, levels):
+    print(f"{'char':<8} {'lv':>2} {'win%':>6} {'time(s)':>8} {'dealt':>7} {'taken':>7}")
+    for char in chars:
+        for level in levels:
+            s = matrix[(char, level)]
+            print(f"{char:<8} {level:>2} {s['win_rate'] * 100:6.1f} {s['avg_round_sec']:8.1f} "
+                  f"{s['avg_damage_dealt']:7.1f} {s['avg_damage_taken']:7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balance matrix: CHAR_TYPES x enemy level")
+    parser.add_argument("--runs", type=int, default=100, help="1組み合わせあたりの対戦回数")
+    parser.add_argument("--chars", nargs="*", default=list(fighting.CHAR_TYPES))
+    parser.add_argument("--levels", nargs="*", type=int, default=[1, 2, 3, 4, 5])
+    parser.add_argument("--player-ai", type=int, default=3, help="プレイヤー側を操作するAIのレベル")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（省略時は全コア）")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--json", help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matrix, simulated = run_matrix(args.chars, args.levels, args.runs, args.player_ai,
+                                   workers=args.workers, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    print_matrix(matrix, args.chars, args.levels)
+    print(f"\n{simulated} matchups simulated, {len(matrix) - simulated} from cache ({elapsed:.1f}s)")
+
+    if args.json:
+        rows = [dict(char=c, level=lv, **matrix[(c, lv)]) for c in args.chars for lv in args.levels]
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""NumPy による格闘ゲームの一括シミュレーター（struct-of-arrays）
+
+数千試合ぶんの Fighter の物理状態を NumPy 配列（形は [試合数, 2]）で持ち、
+全試合を1回の step() でまとめて進める。
+重力・GROUND_Y での着地・摩擦・アクションタイマー・
+攻撃判定と喰らい判定の重なり(get_attack_rect / get_hurt_rect と同じ矩形)を再現する。
+
+技の長さ・判定が出るフレーム・判定の位置・ダメージなどは、import 時に frame_data.FRAME_DATA から
+Action の値で引ける配列にしておく。MOVES を書き換えればこちらも同じ値で動く。
+
+飛び道具（Projectile）は扱わない。shoot はアクションに含めず、
+shoot_cooldown のカウントダウンだけを行う。NumPy が必要（pip install numpy）。
+
+--cross-check を付けると、いくつかの試合を通常の Fighter.update / check_collision で
+同時に動かし、毎フレーム結果が一致することを確認する。
+
+    python tools/batch_sim.py --matches 5000 --char BALANCE --level 3
+    python tools/batch_sim.py --matches 2000 --cross-check 16
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+
+import main as fighting  # noqa: E402
+from frame_data import FRAME_DATA, Action  # noqa: E402
+
+PLAYER, ENEMY = 0, 1
+
+# 比較対象のフィールド（Fighter の属性名と同じ）
+FLOAT_FIELDS = ("x", "y", "vel_x", "vel_y", "health")
+INT_FIELDS = ("action", "action_timer", "hit_cooldown", "damage_flash", "shoot_cooldown")
+STATE_BOOL_FIELDS = ("facing_right", "is_jumping")
+BOOL_FIELDS = STATE_BOOL_FIELDS + ("is_punching", "is_kicking", "is_sliding", "is_guarding", "is_shooting")
+
+
+def _move_table(name, dtype):
+    return np.array([getattr(move, name) for move in FRAME_DATA], dtype=dtype)
+
+
+# 技ごとの値（[action] で引く）
+DURATION = _move_table("duration", np.int64)
+DAMAGE = _move_table("damage", np.float64)
+HELD = _move_table("held", np.bool_)
+CAN_MOVE = _move_table("can_move", np.bool_)
+CAN_JUMP = _move_table("can_jump", np.bool_)
+GROUND = _move_table("ground", np.bool_)
+LUNGE = _move_table("lunge", np.float64)
+FRICTION = _move_table("friction", np.float64)
+TURN = _move_table("turn", np.bool_)
+ACTIVE_MIN = _move_table("active_min", np.int64)
+ACTIVE_MAX = _move_table("active_max", np.int64)
+HAS_HITBOX = np.array([move.hitbox is not None for move in FRAME_DATA], dtype=np.bool_)
+# [action, facing_right, (x, y, 幅, 高さ)]。判定のない技は 0
+HITBOX = np.array([move.hitbox or ((0, 0, 0, 0), (0, 0, 0, 0)) for move in FRAME_DATA], dtype=np.float64)
+HURTBOX = np.array([move.hurtbox for move in FRAME_DATA], dtype=np.float64)
+
+ACTION_KEYS = ("move", "jump", "punch", "kick", "slide", "guard")
+
+
+class BatchSim:
+    """n 試合ぶんの対戦状態をまとめて持つ"""
+
+    def __init__(self, n, char="BALANCE", level=1):
+        self.n = n
+        self.level = np.full(n, level, dtype=np.int64)
+
+        # 初期状態とキャラ性能は通常の Fighter をそのまま使って作る
+        player = fighting.Fighter(200, 1, char)
+        enemy = fighting.Fighter(1000, 2, "BALANCE", level)
+        templates = (player, enemy)
+
+        for name in FLOAT_FIELDS:
+            setattr(self, name, self._from_templates(templates, name, np.float64))
+        for name in INT_FIELDS:
+            setattr(self, name, self._from_templates(templates, name, np.int64))
+        for name in STATE_BOOL_FIELDS:
+            setattr(self, name, self._from_templates(templates, name, np.bool_))
+        self.move_speed = self._from_templates(templates, "move_speed", np.float64)
+        self.jump_power = self._from_templates(templates, "jump_power", np.float64)
+        self.power_mult = self._from_templates(templates, "power_mult", np.float64)
+        self.max_health = self._from_templates(templates, "max_health", np.float64)
+
+        self.done = np.zeros(n, dtype=np.bool_)
+        self.frames = np.zeros(n, dtype=np.int64)
+
+    def _from_templates(self, templates, name, dtype):
+        row = np.array([getattr(t, name) for t in templates], dtype=dtype)
+        return np.tile(row, (self.n, 1))
+
+    # Fighter と同じく is_xxx は action から求める
+    is_punching = property(lambda self: self.action == Action.PUNCH)
+    is_kicking = property(lambda self: self.action == Action.KICK)
+    is_sliding = property(lambda self: self.action == Action.SLIDE)
+    is_guarding = property(lambda self: self.action == Action.GUARD)
+    is_shooting = property(lambda self: self.action == Action.SHOOT)
+
+    # --- 入力 ---------------------------------------------------------
+
+    def start_action(self, side, mask, action):
+        """Fighter.start_action を mask の試合だけに適用する"""
+        s = side
+        current = self.action[:, s]
+        ok = mask & ((current == Action.IDLE) | (HELD[action] & (current == action)))
+        if GROUND[action]:
+            ok &= ~self.is_jumping[:, s]
+        self.action[:, s] = np.where(ok, action, current)
+        if not HELD[action]:
+            self.action_timer[:, s] = np.where(ok, DURATION[action], self.action_timer[:, s])
+        speed = self.move_speed[:, s] * LUNGE[action]
+        lunge = np.where(self.facing_right[:, s], speed, -speed)
+        self.vel_x[:, s] = np.where(ok, lunge, self.vel_x[:, s])
+
+    def apply_actions(self, side, actions):
+        """Game.handle_game_input と同じ順番で move / jump / punch / kick / slide / guard を適用する
+
+        actions: ACTION_KEYS をキーに持つ辞書。move は -1/0/1 の int 配列、他は bool 配列。
+        """
+        s = side
+        live = ~self.done
+
+        ok = live & CAN_MOVE[self.action[:, s]]
+        self.vel_x[:, s] = np.where(ok, actions["move"] * self.move_speed[:, s], self.vel_x[:, s])
+
+        ok = live & actions["jump"] & ~self.is_jumping[:, s] & CAN_JUMP[self.action[:, s]]
+        self.vel_y[:, s] = np.where(ok, self.jump_power[:, s], self.vel_y[:, s])
+        self.is_jumping[:, s] |= ok
+
+        self.start_action(s, live & actions["punch"], Action.PUNCH)
+        self.start_action(s, live & actions["kick"], Action.KICK)
+        self.start_action(s, live & actions["slide"], Action.SLIDE)
+
+        want = actions["guard"]
+        self.start_action(s, live & want, Action.GUARD)
+        release = live & ~want & (self.action[:, s] == Action.GUARD)
+        self.action[:, s] = np.where(release, Action.IDLE, self.action[:, s])
+
+    # --- 物理 ---------------------------------------------------------
+
+    def update_side(self, side):
+        """Fighter.update(opponent) を全試合ぶんまとめて行う"""
+        s, o = side, 1 - side
+        live = ~self.done
+        action = self.action[:, s].copy()  # この update の間は最初の技の値を使う
+
+        face = np.where(TURN[action], self.x[:, o] > self.x[:, s], self.facing_right[:, s])
+        self.facing_right[:, s] = np.where(live, face, self.facing_right[:, s])
+
+        vel_y = self.vel_y[:, s] + fighting.GRAVITY
+        y = self.y[:, s] + vel_y
+        landed = y >= fighting.GROUND_Y
+        y = np.where(landed, fighting.GROUND_Y, y)
+        vel_y = np.where(landed, 0.0, vel_y)
+        self.y[:, s] = np.where(live, y, self.y[:, s])
+        self.vel_y[:, s] = np.where(live, vel_y, self.vel_y[:, s])
+        self.is_jumping[:, s] &= ~(live & landed)
+
+        x = self.x[:, s] + self.vel_x[:, s]
+        vel_x = self.vel_x[:, s] * FRICTION[action]
+        vel_x = np.where(np.abs(vel_x) < 0.1, 0.0, vel_x)
+        x = np.clip(x, 50, fighting.SCREEN_WIDTH - 50)
+        self.x[:, s] = np.where(live, x, self.x[:, s])
+        self.vel_x[:, s] = np.where(live, vel_x, self.vel_x[:, s])
+
+        ticking = live & (self.action_timer[:, s] > 0)
+        self.action_timer[:, s] -= ticking
+        expired = ticking & (self.action_timer[:, s] == 0) & ~HELD[action]
+        self.action[:, s] = np.where(expired, Action.IDLE, self.action[:, s])
+
+        for timers in (self.hit_cooldown, self.damage_flash, self.shoot_cooldown):
+            timers[:, s] -= live & (timers[:, s] > 0)
+
+    # --- 当たり判定 ---------------------------------------------------
+
+    def attack_rects(self, side):
+        """get_attack_rect と同じ矩形 (left, top, w, h) と、判定が出ているかのマスク"""
+        s = side
+        action, t = self.action[:, s], self.action_timer[:, s]
+        active = HAS_HITBOX[action] & (ACTIVE_MIN[action] <= t) & (t < ACTIVE_MAX[action])
+        box = HITBOX[action, self.facing_right[:, s].astype(np.int64)]
+        left = np.where(active, np.trunc(self.x[:, s] + box[:, 0]), 0.0)
+        top = np.where(active, np.trunc(self.y[:, s] + box[:, 1]), 0.0)
+        return left, top, box[:, 2], box[:, 3], active
+
+    def hurt_rects(self, side):
+        """get_hurt_rect と同じ矩形"""
+        s = side
+        box = HURTBOX[self.action[:, s]]
+        return np.trunc(self.x[:, s] + box[:, 0]), np.trunc(self.y[:, s] + box[:, 1]), box[:, 2], box[:, 3]
+
+    def take_damage(self, side, mask, amount):
+        """Fighter.take_damage を mask の試合だけに適用する"""
+        s = side
+        hit = mask & (self.hit_cooldown[:, s] == 0)
+        guarding = self.is_guarding[:, s]
+        amount = np.where(guarding, np.trunc(amount * 0.2), amount)
+        self.hit_cooldown[:, s] = np.where(hit, np.where(guarding, 20, 40), self.hit_cooldown[:, s])
+        health = np.maximum(0.0, self.health[:, s] - amount)
+        self.health[:, s] = np.where(hit, health, self.health[:, s])
+        self.damage_flash[:, s] = np.where(hit, 10, self.damage_flash[:, s])
+
+        knockback = np.where(self.facing_right[:, s], -10, 10)
+        knockback = np.where(guarding, knockback // 2, knockback)
+        self.vel_x[:, s] = np.where(hit, knockback, self.vel_x[:, s])
+        self.vel_y[:, s] = np.where(hit, -5.0, self.vel_y[:, s])
+        interrupted = hit & ~HELD[self.action[:, s]]
+        self.action[:, s] = np.where(interrupted, Action.IDLE, self.action[:, s])
+
+    def check_collision(self):
+        """Game.check_collision（飛び道具以外）と同じ順番で判定する"""
+        live = ~self.done
+        for attacker in (PLAYER, ENEMY):
+            target = 1 - attacker
+            ax, ay, aw, ah, active = self.attack_rects(attacker)
+            hx, hy, hw, hh = self.hurt_rects(target)
+            overlap = (ax < hx + hw) & (hx < ax + aw) & (ay < hy + hh) & (hy < ay + ah)
+            mask = live & active & overlap
+
+            power = self.power_mult[:, attacker]
+            if attacker == PLAYER:
+                damage = DAMAGE[self.action[:, 0]] * power
+            else:
+                damage = (10 + self.level * 2) * power
+            self.take_damage(target, mask, damage)
+
+    def step(self, player_actions, enemy_actions):
+        """Game.update の1フレーム分（入力 → 両者の update → 当たり判定 → 決着判定）"""
+        self.apply_actions(PLAYER, player_actions)
+        self.update_side(PLAYER)
+        self.apply_actions(ENEMY, enemy_actions)
+        self.update_side(ENEMY)
+        self.check_collision()
+
+        live = ~self.done
+        self.frames += live
+        timeout = self.frames >= 60 * fighting.FPS
+        self.done |= live & ((self.health <= 0).any(axis=1) | timeout)
+
+    def run(self, policy, max_frames=60 * fighting.FPS):
+        while not self.done.all() and self.frames.max() < max_frames:
+            self.step(policy(self, PLAYER), policy(self, ENEMY))
+
+    def summary(self):
+        return {
+            "matches": self.n,
+            "win_rate": float((self.health[:, 0] > self.health[:, 1]).mean()),
+            "avg_round_sec": float(self.frames.mean() / fighting.FPS),
+            "avg_damage_dealt": float((self.max_health[:, 1] - self.health[:, 1]).mean()),
+        }
+
+
+class RandomPolicy:
+    """距離に応じて近づく・攻撃する・下がるを乱数で選ぶ簡易AI（全試合まとめて判断）"""
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, sim, side):
+        n = sim.n
+        dx = sim.x[:, 1 - side] - sim.x[:, side]
+        near = np.abs(dx) < 100
+        roll = self.rng.random(n)
+        toward = np.sign(dx).astype(np.int64)
+        move = np.where(near, np.where(roll < 0.2, -toward, 0), toward)
+        return {
+            "move": move,
+            "jump": self.rng.random(n) < 0.02,
+            "punch": near & (roll > 0.6),
+            "kick": near & (roll > 0.8),
+            "slide": ~near & (self.rng.random(n) < 0.01),
+            "guard": near & (roll < 0.1),
+        }
+
+
+def _lane_actions(actions, lane):
+    return {key: (int(actions[key][lane]) if key == "move" else bool(actions[key][lane])) for key in ACTION_KEYS}
+
+
+def _apply_scalar(fighter, a):
+    fighter.move(a["move"])
+    if a["jump"]:
+        fighter.jump()
+    if a["punch"]:
+        fighter.punch()
+    if a["kick"]:
+        fighter.kick()
+    if a["slide"]:
+        fighter.slide()
+    fighter.guard(a["guard"])
+
+
+def cross_check(n, char, level, sample, frames, seed=0):
+    """sample 試合を通常の Fighter で同時に動かし、毎フレーム一致するか確かめる"""
+    sim = BatchSim(n, char, level)
+    policy = RandomPolicy(seed)
+    lanes = np.linspace(0, n - 1, sample).astype(int)
+
+    games = []
+    for _ in lanes:
+        game = fighting.Game(seed=seed, realtime=False)
+        game.selected_char = char
+        game.start_game(level)
+        games.append(game)
+
+    for frame in range(frames):
+        p_actions = policy(sim, PLAYER)
+        e_actions = policy(sim, ENEMY)
+        live_before = ~sim.done
+        sim.step(p_actions, e_actions)
+
+        for lane, game in zip(lanes, games):
+            if not live_before[lane]:
+                continue
+            _apply_scalar(game.player, _lane_actions(p_actions, lane))
+            game.player.update(game.enemy)
+            _apply_scalar(game.enemy, _lane_actions(e_actions, lane))
+            game.enemy.update(game.player)
+            game.check_collision()
+
+            for side, fighter in ((PLAYER, game.player), (ENEMY, game.enemy)):
+                for name in FLOAT_FIELDS + INT_FIELDS + BOOL_FIELDS:
+                    vec = getattr(sim, name)[lane, side]
+                    ref = getattr(fighter, name)
+                    if abs(float(vec) - float(ref)) > 1e-9:
+                        raise AssertionError(
+                            f"lane {lane} side {side} frame {frame}: {name} batch={vec} scalar={ref}")
+        if sim.done.all():
+            break
+    return frame + 1, len(lanes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized batch fighter simulation")
+    parser.add_argument("--matches", type=int, default=5000)
+    parser.add_argument("--char", default="BALANCE", choices=list(fighting.CHAR_TYPES))
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cross-check", type=int, default=0, metavar="N",
+                        help="N試合を通常の Fighter.update と比較する")
+    parser.add_argument("--frames", type=int, default=600, help="クロスチェックするフレーム数")
+    args = parser.parse_args()
+
+    if args.cross_check:
+        frames, lanes = cross_check(args.matches, args.char, args.level, args.cross_check, args.frames, args.seed)
+        print(f"cross-check OK: {lanes} lanes x {frames} frames match Fighter.update")
+        return
+
+    sim = BatchSim(args.matches, args.char, args.level)
+    start = time.perf_counter()
+    sim.run(RandomPolicy(args.seed))
+    elapsed = time.perf_counter() - start
+    total = int(sim.frames.sum())
+
+    s = sim.summary()
+    print(f"{args.char} vs Lv.{args.level}: {args.matches} matches, win {s['win_rate'] * 100:.1f}%, "
+          f"avg {s['avg_round_sec']:.1f}s, dealt {s['avg_damage_dealt']:.1f}")
+    print(f"{total} match-frames in {elapsed * 1000:.1f} ms ({total / (elapsed * 1000):.0f} match-frames/ms)")
+
+
+if __name__ == "__main__":
+    main()
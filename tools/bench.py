@@ -0,0 +1,243 @@
+"""処理の重い部分のベンチマーク（画面なしの Linux でも動く）
+
+SDL_VIDEODRIVER=dummy で起動し、格闘ゲームと避けゲームの次の処理の時間を測る。
+
+    fighter.update          Fighter.update（2人分）
+    fighter.collision       Game.check_collision（飛び道具が飛んでいる状態）
+    fighter.draw            Fighter.draw（2人分）
+    fighter.draw_ui         Game.draw_ui
+    fighter.frame           1フレーム全体（update + draw + flip）
+    dodge.enemies_N         避けゲームの敵の移動と当たり判定（N = 10 / 100 / 1000 体）
+    dodge.frame_N           避けゲームの1フレームの描画（N 体）
+
+乱数のシードは固定なので、何度実行しても同じ状況を測る。1回の測定で BATCH 回呼び、
+それを --repeat 回くり返した中央値を「1回あたりの時間」とする。
+
+結果は JSON で出力でき、--compare で保存しておいた結果（ベースライン）と比べて
+--threshold より遅くなった項目があれば一覧を出して終了コード 1 で終わる（CI 用）。
+
+    python tools/bench.py --json bench.json
+    python tools/bench.py --compare bench.json --threshold 0.15
+    python tools/bench.py --filter dodge
+"""
+import argparse
+import copy
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+
+import pygame  # noqa: E402
+
+import main as fighting  # noqa: E402
+
+BATCH = 50
+DODGE_COUNTS = (10, 100, 1000)
+
+
+def load_dodge():
+    """避けゲームの main.py を別名で読み込む（格闘ゲームの main と名前がぶつかるので）"""
+    path = os.path.join(ROOT, "dodge_game", "main.py")
+    spec = importlib.util.spec_from_file_location("dodge_main", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(setup, run, repeat):
+    """setup() で状態を作り直してから run() を BATCH 回呼ぶ、を repeat 回。1回あたりの ns の一覧を返す"""
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter_ns()
+        for _ in range(BATCH):
+            run()
+        times.append((time.perf_counter_ns() - start) / BATCH)
+    return times
+
+
+def fighting_game(seed=0):
+    """両者が技を出していて、飛び道具も何発か飛んでいる試合の途中の状態"""
+    game = fighting.Game(seed=seed, realtime=False)
+    game.start_game()
+    game.start_delay = 0
+    for _ in range(90):
+        game.handle_game_input(dict(fighting.NO_INPUT, RIGHT=True))
+        game.update()
+    for i in range(6):
+        game.projectiles.spawn(300 + i * 120, game.player.y - 60, i % 2 == 0, game.player if i % 2 else game.enemy)
+    game.player.punch()
+    game.enemy.kick()
+    return game
+
+
+def fighting_cases():
+    fighting.init_display()
+    screen = fighting.screen
+    saved = {}
+
+    def setup():
+        game = fighting_game()
+        saved["game"] = game
+        saved["state"] = game.save_state()
+
+    def restore():
+        # 毎回同じ状態から測る（take_damage などで状態が変わるので）
+        game = saved.get("game")
+        if game is None:
+            setup()
+        else:
+            game.load_state(saved["state"])
+
+    def fighter_update():
+        game = saved["game"]
+        game.player.update(game.enemy)
+        game.enemy.update(game.player)
+
+    def collision():
+        saved["game"].check_collision()
+
+    def draw():
+        game = saved["game"]
+        game.player.draw(screen)
+        game.enemy.draw(screen)
+
+    def draw_ui():
+        saved["game"].draw_ui()
+
+    def frame():
+        game = saved["game"]
+        game.update()
+        game.draw()
+        pygame.display.flip()
+
+    return [
+        ("fighter.update", restore, fighter_update),
+        ("fighter.collision", restore, collision),
+        ("fighter.draw", restore, draw),
+        ("fighter.draw_ui", restore, draw_ui),
+        ("fighter.frame", restore, frame),
+    ]
+
+
+def dodge_cases(dodge):
+    dodge.init_display()
+    screen = dodge.SCREEN
+    background = dodge.BackgroundLayer(dodge.paint_background)
+    char_image = dodge.create_default_character()
+    char_rect = char_image.get_rect(center=(dodge.SCREEN_WIDTH // 2, dodge.SCREEN_HEIGHT // 2))
+    hitbox = char_rect.inflate(-15, -15)
+    cases = []
+
+    for count in DODGE_COUNTS:
+        random.seed(count)
+        dodge.level = 5  # 追いかけてくる敵も混ざるレベル
+        template = [dodge.Enemy("chase" if i % 5 == 0 else "normal") for i in range(count)]
+        items = [dodge.Item() for _ in range(3)]
+
+        def setup(template=template):
+            dodge.enemies = [copy.copy(e) for e in template]
+            for e in dodge.enemies:
+                e.rect = e.rect.copy()
+
+        def enemies():
+            dodge.update_enemies(char_rect)
+            dodge.hits_enemy(hitbox)
+
+        def frame(items=items):
+            background.draw(screen)
+            screen.blit(char_image, char_rect)
+            for item in items:
+                item.draw(screen)
+            for enemy in dodge.enemies:
+                enemy.draw(screen)
+            pygame.display.flip()
+
+        cases.append((f"dodge.enemies_{count}", setup, enemies))
+        cases.append((f"dodge.frame_{count}", setup, frame))
+    return cases
+
+
+def run_all(args):
+    dodge = load_dodge()
+    # 画面は1つしか作れないので、ゲームごとに作り直してから測る
+    groups = [lambda: dodge_cases(dodge), fighting_cases]
+    results = {}
+    for make_cases in groups:
+        for name, setup, run in make_cases():
+            if args.filter and args.filter not in name:
+                continue
+            measure(setup, run, 2)  # ウォームアップ（キャッシュを温める）
+            times = sorted(measure(setup, run, args.repeat))
+            results[name] = {
+                "median_us": times[len(times) // 2] / 1000,
+                "min_us": times[0] / 1000,
+                "max_us": times[-1] / 1000,
+            }
+            print(f"{name:<22}{results[name]['median_us']:>10.1f} us  (min {results[name]['min_us']:.1f})")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ベースラインより threshold 以上遅くなった項目の名前を返す"""
+    regressions = []
+    print(f"\n{'':<22}{'baseline':>10}{'now':>10}{'change':>9}")
+    for name, r in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            print(f"{name:<22}{'-':>10}{r['median_us']:>10.1f}     new")
+            continue
+        change = r["median_us"] / old["median_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<22}{old['median_us']:>10.1f}{r['median_us']:>10.1f}{change * 100:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and rendering hot paths")
+    parser.add_argument("--repeat", type=int, default=21, help="測定の回数（中央値をとる）")
+    parser.add_argument("--filter", help="名前にこの文字列を含む項目だけ測る")
+    parser.add_argument("--json", help="結果を保存するファイル")
+    parser.add_argument("--compare", help="比べるベースライン（--json で保存したファイル）")
+    parser.add_argument("--threshold", type=float, default=0.15, help="これ以上遅くなったら失敗（0.15 = 15%%）")
+    args = parser.parse_args()
+
+    results = run_all(args)
+    output = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "video_driver": os.environ["SDL_VIDEODRIVER"],
+        "batch": BATCH,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nno regressions")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""敵AIのベンチマーク（確率AI と 先読みAI の比較）
+
+ヘッドレスで対戦させて、1フレームの Game.update() にかかる時間（AI の分を含む）と、
+先読みAI が1秒あたり何回判断できるか、時間切れで確率AIに任せた回数を表示する。
+
+--mode budget   実際のゲームと同じく、時間（--budget-us）で先読みを打ち切る
+--mode fixed    ヘッドレス・リプレイと同じく、決まった回数だけ先読みする（毎回同じ結果）
+
+    python tools/bench_ai.py --level 5 --rounds 10
+    python tools/bench_ai.py --mode fixed --json bench_ai.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+
+import main as fighting  # noqa: E402
+from headless import HeadlessMatch  # noqa: E402
+from search_ai import BUDGET_US  # noqa: E402
+
+FRAME_BUDGET_MS = 1000 / fighting.FPS
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))
+    return sorted_values[i]
+
+
+def bench(ai, args):
+    frame_ms = []
+    wins = 0
+    decisions = fallbacks = rollouts = search_ns = 0
+    for i in range(args.rounds):
+        match = HeadlessMatch(args.char, args.level, args.seed + i, player_ai_level=args.player_ai, ai=ai)
+        game = match.game
+        if args.mode == "budget":
+            game.realtime = True  # 時間で打ち切るモードにする（1ラウンドだけなのでステージ遷移には影響しない）
+        planner = getattr(game.enemy_ai, "planner", None)
+        if planner:
+            planner.budget_us = args.budget_us
+
+        while match.frame < args.max_frames and not match.finished():
+            start = time.perf_counter_ns()
+            match.step()
+            frame_ms.append((time.perf_counter_ns() - start) / 1e6)
+        wins += match.result()["winner"] == "enemy"
+
+        if planner:
+            decisions += planner.decisions
+            fallbacks += planner.fallbacks
+            rollouts += planner.rollouts
+            search_ns += planner.search_ns
+
+    frame_ms.sort()
+    result = {
+        "ai": ai,
+        "frames": len(frame_ms),
+        "enemy_wins": wins,
+        "rounds": args.rounds,
+        "mean_ms": sum(frame_ms) / max(len(frame_ms), 1),
+        "p95_ms": percentile(frame_ms, 95),
+        "p99_ms": percentile(frame_ms, 99),
+        "max_ms": frame_ms[-1] if frame_ms else 0.0,
+        "over_frame_budget": sum(1 for t in frame_ms if t > FRAME_BUDGET_MS),
+    }
+    if decisions:
+        result.update({
+            "decisions": decisions,
+            "decisions_per_sec": decisions / (search_ns / 1e9),
+            "mean_decision_us": search_ns / 1000 / decisions,
+            "rollouts": rollouts,
+            "fallbacks": fallbacks,
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the enemy AI tiers")
+    parser.add_argument("--char", default="BALANCE", choices=list(fighting.CHAR_TYPES))
+    parser.add_argument("--level", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--player-ai", type=int, default=3, help="プレイヤー側AIのレベル")
+    parser.add_argument("--mode", choices=("budget", "fixed"), default="budget")
+    parser.add_argument("--budget-us", type=int, default=BUDGET_US,
+                        help="先読みに使ってよい時間（マイクロ秒）")
+    parser.add_argument("--max-frames", type=int, default=60 * fighting.FPS)
+    parser.add_argument("--json", help="結果をJSONで保存するファイル")
+    args = parser.parse_args()
+
+    results = [bench(ai, args) for ai in fighting.AI_TIERS]
+    for r in results:
+        print(f"{r['ai']:>9}: {r['frames']} frames, enemy won {r['enemy_wins']}/{r['rounds']}, "
+              f"update mean {r['mean_ms']:.3f} ms / p95 {r['p95_ms']:.3f} / p99 {r['p99_ms']:.3f} / "
+              f"max {r['max_ms']:.3f}, over {FRAME_BUDGET_MS:.1f} ms: {r['over_frame_budget']}")
+        if "decisions" in r:
+            print(f"{'':>11}{r['decisions']} decisions, {r['decisions_per_sec']:.0f}/s, "
+                  f"mean {r['mean_decision_us']:.0f} us, {r['rollouts']} rollouts, "
+                  f"fallbacks {r['fallbacks']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mode": args.mode, "budget_us": args.budget_us, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
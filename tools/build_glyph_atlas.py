@@ -0,0 +1,109 @@
+"""格闘ゲームの日本語表示用のグリフアトラスを作る（ビルド時に1回だけ実行）
+
+fighting_game/main.py の UI_TEXT["ja"] と EXE版（fighting_original.py）の文字列に出てくる文字と ASCII の文字だけを、
+日本語フォントで文字の大きさ（--sizes）ごとに1枚の画像にする。
+
+    fighting_game/assets/glyphs_32.png   白い文字 + 透明の画像
+    fighting_game/assets/glyphs_32.json  文字ごとの位置と幅、行の高さ
+
+ゲームはこのファイルがあれば日本語で表示し、なければ今まで通り英語で表示する（common/glyph_atlas.py）。
+EXE版も同じファイルを使う（clean_and_build.bat で --add-data して EXE に入れる）。
+日本語フォントはこのリポジトリに含めていないので、--font で指定するか、
+インストールされている日本語フォントを探して使う（GitHub Actions では fonts-noto-cjk を入れている）。
+
+    python tools/build_glyph_atlas.py --font /usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+sys.path.insert(0, ROOT)
+
+import pygame  # noqa: E402
+
+import main as fighting  # noqa: E402
+from common.font_resolver import resolve_font  # noqa: E402
+from common.glyph_atlas import atlas_paths  # noqa: E402
+
+# --font を省略したときに探すフォント
+JAPANESE_FONTS = ["notosanscjkjp", "notosanscjk", "notosansjp", "ipagothic", "takaogothic",
+                  "meiryo", "yugothic", "msgothic"]
+EXE_SOURCE = os.path.join(ROOT, "fighting_original.py")
+SHEET_WIDTH = 1024
+PADDING = 1  # となりの文字がにじまないように空ける
+
+
+def exe_strings():
+    """EXE版の文字列（import すると画面が開くので、ソースから f-string の部分も含めて取り出す）"""
+    with open(EXE_SOURCE, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [node.value for node in ast.walk(tree) if isinstance(node, ast.Constant) and isinstance(node.value, str)]
+
+
+def used_characters():
+    """UI_TEXT["ja"] と EXE版の文字 + ASCII の表示できる文字（数字や英語の部分も同じ見た目にするため）"""
+    chars = set(chr(c) for c in range(32, 127))
+    for text in list(fighting.UI_TEXT["ja"].values()) + exe_strings():
+        chars.update(ch for ch in text if ch.isprintable())
+    return sorted(chars)
+
+
+def build(font_path, size, chars, out_dir):
+    font = pygame.font.Font(font_path, size)
+    rendered = [(ch, font.render(ch, True, (255, 255, 255))) for ch in chars]
+    # 文字によっては get_height() より高く描かれるので、一番高い文字に合わせる（下の段にはみ出さないように）
+    height = max([font.get_height()] + [surface.get_height() for _, surface in rendered])
+
+    # 左上から横に並べ、はみ出したら次の段へ（高さはどの文字も行の高さ）
+    positions = {}
+    x = y = 0
+    for ch, surface in rendered:
+        w = surface.get_width()
+        if x + w > SHEET_WIDTH:
+            x = 0
+            y += height + PADDING
+        positions[ch] = (x, y, w)
+        x += w + PADDING
+
+    sheet = pygame.Surface((SHEET_WIDTH, y + height), pygame.SRCALPHA)
+    sheet.fill((255, 255, 255, 0))
+    for ch, surface in rendered:
+        gx, gy, _ = positions[ch]
+        sheet.blit(surface, (gx, gy))
+
+    image_path, json_path = atlas_paths(out_dir, size)
+    pygame.image.save(sheet, image_path)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"size": size, "height": height, "font": os.path.basename(font_path),
+                   "glyphs": positions}, f, ensure_ascii=False, separators=(",", ":"))
+    return os.path.getsize(image_path) + os.path.getsize(json_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Japanese glyph atlas for the fighting game")
+    parser.add_argument("--font", help="日本語フォントのファイル（省略時はインストールされているものを探す）")
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(fighting.FONT_SIZES))
+    parser.add_argument("--out", default=fighting.GLYPH_DIR)
+    args = parser.parse_args()
+
+    pygame.font.init()
+    font_path = args.font or resolve_font(JAPANESE_FONTS)
+    if not font_path:
+        raise SystemExit("no Japanese font found; pass --font PATH (e.g. NotoSansCJK-Regular.ttc)")
+
+    chars = used_characters()
+    os.makedirs(args.out, exist_ok=True)
+    for size in args.sizes:
+        nbytes = build(font_path, size, chars, args.out)
+        print(f"size {size}: {len(chars)} glyphs, {nbytes / 1024:.1f} KB")
+    print(f"wrote {args.out} from {font_path}")
+
+
+if __name__ == "__main__":
+    main()
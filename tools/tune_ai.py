@@ -0,0 +1,226 @@
+"""敵AIのパラメータ調整ツール（ヘッドレス対戦で探索）
+
+ステージ(1〜5)ごとに、プレイヤー側（PROFILES）との対戦でのプレイヤーの勝率が
+目標（TARGETS）に近くなる敵AIのパラメータ（main.default_ai_params のキー）を探す。
+
+探し方は簡単な進化戦略: 今一番よいパラメータの周りに --population 個の候補を作り、
+全部を同じシードで対戦させて（プロセスプールで全コアに分散）、目標に一番近いものを次の中心にする。
+世代が進むごとに探す幅を --shrink 倍ずつ狭めていく。
+
+世代が終わるたびに .tune_checkpoint.json に途中経過を保存するので、
+止めても --resume で続きから再開できる。結果は fighting_game/ai_params.json に書き出され、
+EnemyAI が起動時に読み込む（ファイルがなければ今まで通りの式の値を使う）。
+--stages で一部のステージだけ調整したときは、ほかのステージの値はファイルに残す。
+
+プレイヤー側のプロファイル:
+    ai:N          レベル N の EnemyAI（調整前の式のパラメータ）が操作する
+    random        ランダムなボタン入力
+    replay:PATH   記録したリプレイ（.fgr ファイルか、それが入ったフォルダ）の入力を繰り返す
+
+    python tools/tune_ai.py --generations 8 --population 12 --runs 40
+    python tools/tune_ai.py --resume
+    python tools/tune_ai.py --stages 4 5 --profiles ai:3 replay:replays/
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fighting_game"))
+
+import main as fighting  # noqa: E402
+from headless import HeadlessMatch  # noqa: E402
+from replay import ReplayReader  # noqa: E402
+
+CHECKPOINT = os.path.join(ROOT, ".tune_checkpoint.json")
+
+# ステージごとのプレイヤーの目標勝率（後のステージほど難しく）
+TARGETS = {1: 0.85, 2: 0.7, 3: 0.55, 4: 0.4, 5: 0.25}
+
+# 探すパラメータ: 名前 -> (最小, 最大, 整数か)
+PARAM_SPACE = {
+    "attack_chance": (0.05, 1.0, False),
+    "jump_chance": (0.0, 0.6, False),
+    "guard_chance": (0.0, 0.6, False),
+    "shoot_chance_mid": (0.0, 0.4, False),
+    "shoot_chance_far": (0.0, 0.5, False),
+    "slide_chance": (0.0, 0.5, False),
+    "attack_cooldown_frames": (15, 100, True),
+    "reaction": (3, 40, True),
+    "block_chance": (0.0, 0.9, False),
+}
+
+
+def mutate(center, scale, rng):
+    """center の各パラメータを、範囲 × scale くらいの幅でランダムにずらす"""
+    params = dict(center)
+    for name, (low, high, integer) in PARAM_SPACE.items():
+        value = center[name] + rng.gauss(0, scale * (high - low))
+        value = max(low, min(high, value))
+        params[name] = int(round(value)) if integer else round(value, 3)
+    return params
+
+
+def load_replay_inputs(path):
+    paths = sorted(glob.glob(os.path.join(path, "*.fgr"))) if os.path.isdir(path) else [path]
+    streams = [ReplayReader.load(p).inputs for p in paths]
+    streams = [s for s in streams if s]
+    if not streams:
+        raise SystemExit(f"no replays found in {path}")
+    return streams
+
+
+def make_player(profile, seed):
+    """プロファイルから (script, player_ai_level) を作る"""
+    kind, _, arg = profile.partition(":")
+    if kind == "ai":
+        return None, int(arg)
+    if kind == "random":
+        rng = random.Random(seed)
+        current = {}
+
+        def script(frame, game):
+            if frame % 10 == 0:
+                current.update({key: rng.random() < 0.3 for key in fighting.INPUT_KEYS})
+                current["R"] = False
+            return current
+        return script, None
+    if kind == "replay":
+        streams = load_replay_inputs(arg)
+        inputs = [fighting.unpack_inputs(bits) for bits in streams[seed % len(streams)]]
+        return (lambda frame, game: inputs[frame % len(inputs)]), None
+    raise SystemExit(f"unknown profile: {profile}")
+
+
+def run_chunk(stage, params, profile, seeds, chars):
+    """params の敵AIで、profile のプレイヤーと seeds の数だけ対戦してプレイヤーの勝ち数を返す"""
+    fighting.AI_PARAMS[stage] = params
+    wins = 0
+    for seed in seeds:
+        script, player_ai_level = make_player(profile, seed)
+        match = HeadlessMatch(chars[seed % len(chars)], stage, seed, script, player_ai_level)
+        wins += match.run_round()["winner"] == "player"
+    return wins
+
+
+def evaluate(pool, stage, candidates, args):
+    """候補ごとのプレイヤーの勝率（全プロファイルの合計）"""
+    futures = []
+    for params in candidates:
+        chunk_futures = []
+        for profile in args.profiles:
+            for start in range(0, args.runs, args.chunk_size):
+                seeds = list(range(start, min(start + args.chunk_size, args.runs)))
+                chunk_futures.append(pool.submit(run_chunk, stage, params, profile, seeds, args.chars))
+        futures.append(chunk_futures)
+    total = args.runs * len(args.profiles)
+    return [sum(f.result() for f in chunk_futures) / total for chunk_futures in futures]
+
+
+def settings_of(args):
+    """これが変わったら途中経過は使えない"""
+    return {"profiles": args.profiles, "runs": args.runs, "population": args.population,
+            "scale": args.scale, "shrink": args.shrink, "seed": args.seed, "chars": args.chars,
+            "targets": {str(s): TARGETS[s] for s in args.stages}}
+
+
+def load_checkpoint(args):
+    if not args.resume or not os.path.exists(args.checkpoint):
+        return {"settings": settings_of(args), "stages": {}}
+    with open(args.checkpoint, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint["settings"] != settings_of(args):
+        raise SystemExit(f"{args.checkpoint} was made with different settings; run without --resume to start over")
+    return checkpoint
+
+
+def save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)  # 書き込み途中で止まっても前のファイルが壊れないように
+
+
+def write_params(path, checkpoint, args):
+    """調整したステージだけを書き換える（--stages 4 5 で、ほかのステージの調整結果を消さないように）"""
+    data = {"generated_by": "tools/tune_ai.py", "profiles": {}, "targets": {}, "win_rates": {}, "stages": {}}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            old = json.load(f)
+        for key in ("profiles", "targets", "win_rates", "stages"):
+            if isinstance(old.get(key), dict):
+                data[key].update(old[key])
+    for s, state in checkpoint["stages"].items():
+        data["profiles"][s] = args.profiles
+        data["targets"][s] = TARGETS[int(s)]
+        data["win_rates"][s] = state["win_rate"]
+        data["stages"][s] = state["best"]
+    save_json(path, data)
+
+
+def tune_stage(pool, stage, checkpoint, args):
+    target = TARGETS[stage]
+    state = checkpoint["stages"].get(str(stage))
+    if state is None:
+        state = {"generation": 0, "best": fighting.default_ai_params(stage), "score": None,
+                 "win_rate": None, "history": []}
+        checkpoint["stages"][str(stage)] = state
+
+    while state["generation"] < args.generations:
+        g = state["generation"]
+        rng = random.Random(f"{args.seed}-{stage}-{g}")
+        scale = args.scale * args.shrink ** g
+        candidates = [] if state["score"] is not None else [state["best"]]  # 最初は調整前の値も測る
+        candidates += [mutate(state["best"], scale, rng) for _ in range(args.population)]
+
+        start = time.perf_counter()
+        win_rates = evaluate(pool, stage, candidates, args)
+        for params, win_rate in zip(candidates, win_rates):
+            score = abs(win_rate - target)
+            if state["score"] is None or score < state["score"]:
+                state.update(best=params, score=score, win_rate=win_rate)
+
+        state["generation"] += 1
+        state["history"].append({"generation": g, "win_rate": state["win_rate"], "score": state["score"]})
+        save_json(args.checkpoint, checkpoint)
+        print(f"stage {stage} gen {g + 1}/{args.generations}: best win rate {state['win_rate'] * 100:.1f}% "
+              f"(target {target * 100:.0f}%), {len(candidates)} candidates in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune enemy AI parameters per stage")
+    parser.add_argument("--stages", nargs="*", type=int, default=[1, 2, 3, 4, 5])
+    parser.add_argument("--profiles", nargs="*", default=["ai:2", "ai:4", "random"])
+    parser.add_argument("--chars", nargs="*", default=list(fighting.CHAR_TYPES))
+    parser.add_argument("--runs", type=int, default=40, help="候補1つ・プロファイル1つあたりの対戦回数")
+    parser.add_argument("--population", type=int, default=12, help="1世代で試す候補の数")
+    parser.add_argument("--generations", type=int, default=8)
+    parser.add_argument("--scale", type=float, default=0.2, help="最初の世代で探す幅（範囲に対する割合）")
+    parser.add_argument("--shrink", type=float, default=0.8, help="世代ごとに探す幅を何倍にするか")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（省略時は全コア）")
+    parser.add_argument("--checkpoint", default=CHECKPOINT)
+    parser.add_argument("--resume", action="store_true", help="チェックポイントから続ける")
+    parser.add_argument("--output", default=fighting.AI_PARAMS_FILE)
+    args = parser.parse_args()
+
+    checkpoint = load_checkpoint(args)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for stage in args.stages:
+            tune_stage(pool, stage, checkpoint, args)
+            write_params(args.output, checkpoint, args)
+
+    for stage in args.stages:
+        state = checkpoint["stages"][str(stage)]
+        print(f"stage {stage}: win rate {state['win_rate'] * 100:.1f}% (target {TARGETS[stage] * 100:.0f}%)")
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""オンライン対戦テスト用の UDP 中継サーバー
+
+1P と 2P のパケットを相手に転送する。わざと遅延・ゆらぎ・パケットロスを加えられるので、
+同じパソコンの2プロセスで回線の悪い状況を再現できる。
+
+    python tools/udp_relay.py --port 7000 --latency 80 --jitter 20 --loss 0.1
+"""
+import argparse
+import heapq
+import random
+import select
+import socket
+import time
+
+HEADER_SENDER = 2  # パケットの3バイト目が送信者（1 or 2）。fighting_game/netplay.py の HEADER を参照
+
+
+class Relay:
+    def __init__(self, port, latency_ms=0, jitter_ms=0, loss=0.0, seed=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("0.0.0.0", port))
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.peers = {}   # 1 / 2 -> アドレス
+        self.queue = []   # (届ける時刻, 連番, データ, 送り先)
+        self.count = 0
+        self.forwarded = 0
+        self.dropped = 0
+
+    def receive(self, data, addr):
+        if len(data) <= HEADER_SENDER:
+            return
+        sender = data[HEADER_SENDER]
+        self.peers[sender] = addr
+        target = self.peers.get(3 - sender)
+        if target is None:
+            return
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        self.count += 1
+        heapq.heappush(self.queue, (time.monotonic() + delay, self.count, data, target))
+
+    def flush(self):
+        now = time.monotonic()
+        while self.queue and self.queue[0][0] <= now:
+            _, _, data, target = heapq.heappop(self.queue)
+            self.sock.sendto(data, target)
+            self.forwarded += 1
+
+    def run(self):
+        last_report = time.monotonic()
+        while True:
+            timeout = 0.05
+            if self.queue:
+                timeout = max(0.0, min(timeout, self.queue[0][0] - time.monotonic()))
+            ready, _, _ = select.select([self.sock], [], [], timeout)
+            if ready:
+                try:
+                    data, addr = self.sock.recvfrom(2048)
+                except ConnectionResetError:
+                    continue
+                self.receive(data, addr)
+            self.flush()
+
+            if time.monotonic() - last_report > 5:
+                print(f"forwarded {self.forwarded}, dropped {self.dropped}, peers {sorted(self.peers)}")
+                last_report = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP relay with artificial latency and packet loss")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--latency", type=float, default=0, help="片道の遅延(ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="遅延のゆらぎ(ms)")
+    parser.add_argument("--loss", type=float, default=0.0, help="パケットを捨てる確率(0〜1)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    relay = Relay(args.port, args.latency, args.jitter, args.loss, args.seed)
+    print(f"relay listening on :{args.port} (latency {args.latency}ms, jitter {args.jitter}ms, loss {args.loss})")
+    try:
+        relay.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()